@@ -4,15 +4,18 @@ import copy
 import itertools
 import functools
 import logging
+import operator
 import random
 import secrets
+import threading
 import typing  # this can go away when Python 3.8 support is dropped
 from argparse import Namespace
+from array import array
 from collections import Counter, deque
-from collections.abc import Collection, MutableSequence
+from collections.abc import Collection, MutableMapping, MutableSequence, MutableSet
 from enum import IntEnum, IntFlag
-from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, TypedDict, Union, \
-    Type, ClassVar
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, \
+    TypedDict, Union, Type, ClassVar
 
 import NetUtils
 import Options
@@ -65,6 +68,7 @@ class MultiWorld():
     is_race: bool = False
     precollected_items: Dict[int, List[Item]]
     state: CollectionState
+    sphere_cache: SphereCache
 
     plando_options: PlandoOptions
     accessibility: Dict[int, Options.Accessibility]
@@ -87,6 +91,8 @@ class MultiWorld():
     random: random.Random
     per_slot_randoms: Utils.DeprecateDict[int, random.Random]
     """Deprecated. Please use `self.random` instead."""
+    profile_report: Optional[Utils.ProfileReport] = None
+    """records the stages of generation, if a report was requested"""
 
     class AttributeProxy():
         def __init__(self, rule):
@@ -99,11 +105,45 @@ class MultiWorld():
         region_cache: Dict[int, Dict[str, Region]]
         entrance_cache: Dict[int, Dict[str, Entrance]]
         location_cache: Dict[int, Dict[str, Location]]
+        indexed_regions: Dict[int, List[Region]]
+        """every Region created per player, at its Region.index"""
+        indexed_entrances: Dict[int, List[Entrance]]
+        """every Entrance added to a Region's exits per player, at its Entrance.index"""
+        indexed_locations: Dict[int, List[Optional[Location]]]
+        """every Location added to a Region's locations per player, at its Location.index. None once removed again"""
+        filled_flags: Dict[int, bytearray]
+        """per player, 1 at the Location.index of every indexed Location holding an Item"""
+        unfilled_flags: Dict[int, bytearray]
+        """per player, 1 at the Location.index of every indexed Location without an Item"""
+        item_locations: Dict[Tuple[int, str], Dict[Tuple[int, int], Location]]
+        """(item player, item name): (player, index) of Locations that held such an Item: Location"""
+        changed_locations: List[Location]
+        """Locations that got their Item set since the flags and item_locations were last brought up to date"""
+        detached_locations: List[Location]
+        """indexed Locations without a parent_region, which can't report setting their Item"""
+        placement_version: int
+        """raised whenever a Location with a parent_region gets its Item set or a Location gets (un)indexed"""
+        placement_lock: threading.Lock
+        """held while bringing the flags and item_locations up to date and reading them, as output runs threaded"""
+        entrance_dependents: Dict[int, Tuple[Tuple[int, int], Optional[bytearray], Dict[str, List[int]]]]
+        """per player: (Entrance.rule_version and entrance count it was built for,
+        flags of entrances without declared items or None if there are none, entrance indices by declared item)"""
 
         def __init__(self, players: int):
             self.region_cache = {player: {} for player in range(1, players+1)}
             self.entrance_cache = {player: {} for player in range(1, players+1)}
             self.location_cache = {player: {} for player in range(1, players+1)}
+            self.indexed_regions = {player: [] for player in range(1, players+1)}
+            self.indexed_entrances = {player: [] for player in range(1, players+1)}
+            self.indexed_locations = {player: [] for player in range(1, players+1)}
+            self.filled_flags = {player: bytearray() for player in range(1, players+1)}
+            self.unfilled_flags = {player: bytearray() for player in range(1, players+1)}
+            self.item_locations = {}
+            self.changed_locations = []
+            self.detached_locations = []
+            self.placement_version = 0
+            self.placement_lock = threading.Lock()
+            self.entrance_dependents = {}
 
         def __iadd__(self, other: Iterable[Region]):
             self.extend(other)
@@ -124,6 +164,115 @@ class MultiWorld():
             self.region_cache[new_id] = {}
             self.entrance_cache[new_id] = {}
             self.location_cache[new_id] = {}
+            self.indexed_regions.setdefault(new_id, [])
+            self.indexed_entrances.setdefault(new_id, [])
+            self.indexed_locations.setdefault(new_id, [])
+            self.filled_flags.setdefault(new_id, bytearray())
+            self.unfilled_flags.setdefault(new_id, bytearray())
+
+        def index_region(self, region: Region) -> None:
+            indexed_regions = self.indexed_regions.setdefault(region.player, [])
+            region.index = len(indexed_regions)
+            indexed_regions.append(region)
+
+        def index_entrance(self, entrance: Entrance) -> None:
+            indexed_entrances = self.indexed_entrances.setdefault(entrance.player, [])
+            entrance.index = len(indexed_entrances)
+            indexed_entrances.append(entrance)
+
+        def get_entrance_dependents(self, player: int) -> Tuple[Optional[bytearray], Dict[str, List[int]]]:
+            """
+            Returns the flags of player's indexed Entrances whose access rule didn't declare the items it reads,
+            None if there are none, and the indices of the other Entrances by item name their rule declared.
+            """
+            indexed_entrances = self.indexed_entrances[player]
+            version = Entrance.rule_version, len(indexed_entrances)
+            cached = self.entrance_dependents.get(player)
+            if cached and cached[0] == version:
+                return cached[1], cached[2]
+            undeclared = bytearray(len(indexed_entrances))
+            dependents: Dict[str, List[int]] = {}
+            for entrance in indexed_entrances:
+                dependencies = entrance.access_dependencies
+                if dependencies is None or dependencies[0] is not entrance.access_rule:
+                    undeclared[entrance.index] = 1
+                else:
+                    for item_name in dependencies[1]:
+                        dependents.setdefault(item_name, []).append(entrance.index)
+            self.entrance_dependents[player] = version, undeclared if any(undeclared) else None, dependents
+            return self.entrance_dependents[player][1:]
+
+        def index_location(self, location: Location) -> None:
+            indexed_locations = self.indexed_locations.setdefault(location.player, [])
+            location.index = len(indexed_locations)
+            indexed_locations.append(location)
+            self.filled_flags.setdefault(location.player, bytearray()).append(0)
+            self.unfilled_flags.setdefault(location.player, bytearray()).append(0)
+            self.changed_locations.append(location)
+            self.placement_version += 1
+            if not location.parent_region:
+                self.detached_locations.append(location)
+
+        def unindex_location(self, location: Location) -> None:
+            if self.is_indexed(location):
+                self.indexed_locations[location.player][location.index] = None
+                self.filled_flags[location.player][location.index] = 0
+                self.unfilled_flags[location.player][location.index] = 0
+                self.placement_version += 1
+
+        def is_indexed(self, location: Location) -> bool:
+            indexed_locations = self.indexed_locations.get(location.player, ())
+            return 0 <= location.index < len(indexed_locations) and indexed_locations[location.index] is location
+
+        def update_placements(self) -> None:
+            """Brings the flags and item_locations up to date with changed_locations"""
+            with self.placement_lock:
+                self._update_placements()
+
+        def _update_placements(self) -> None:
+            # take the list first, so a Location set meanwhile lands in the next one instead of getting cleared
+            changed, self.changed_locations = self.changed_locations, []
+            if self.detached_locations:
+                changed += self.detached_locations
+                self.detached_locations = [location for location in self.detached_locations
+                                           if not location.parent_region and self.is_indexed(location)]
+            for location in changed:
+                if self.is_indexed(location):
+                    item = location.item
+                    self.filled_flags[location.player][location.index] = item is not None
+                    self.unfilled_flags[location.player][location.index] = item is None
+                    if item:
+                        self.item_locations.setdefault((item.player, item.name), {})[
+                            location.player, location.index] = location
+
+        def get_filled_locations(self, players: Iterable[int]) -> List[Location]:
+            """Returns the indexed Locations of players holding an Item, in the order of MultiWorld.get_locations"""
+            with self.placement_lock:
+                self._update_placements()
+                return [location for player in players
+                        for location in itertools.compress(self.indexed_locations[player], self.filled_flags[player])]
+
+        def get_unfilled_locations(self, players: Iterable[int]) -> List[Location]:
+            """Returns the indexed Locations of players without an Item, in the order of MultiWorld.get_locations"""
+            with self.placement_lock:
+                self._update_placements()
+                return [location for player in players
+                        for location in itertools.compress(self.indexed_locations[player],
+                                                           self.unfilled_flags[player])]
+
+        def get_item_locations(self, item_names: Iterable[str], players: Iterable[int]) -> List[Location]:
+            """Returns the indexed Locations holding an Item of one of item_names owned by one of players,
+            in the order of MultiWorld.get_locations"""
+            positions: Dict[Tuple[int, int], Location] = {}
+            with self.placement_lock:
+                self._update_placements()
+                for player in players:
+                    for item_name in item_names:
+                        positions.update(self.item_locations.get((player, item_name), ()))
+            # entries are only ever added, so drop those of items that were moved, removed or renamed since
+            return [location for position, location in sorted(positions.items())
+                    if location.item and location.item.player in players and location.item.name in item_names
+                    and self.is_indexed(location)]
 
         def __iter__(self) -> Iterator[Region]:
             for regions in self.region_cache.values():
@@ -156,6 +305,7 @@ class MultiWorld():
         self.customitemarray = []
         self.shuffle_ganon = True
         self.spoiler = Spoiler(self)
+        self.sphere_cache = SphereCache(self)
         self.early_items = {player: {} for player in self.player_ids}
         self.local_early_items = {player: {} for player in self.player_ids}
         self.indirect_connections = {}
@@ -413,26 +563,17 @@ class MultiWorld():
         return [loc.item for loc in self.get_filled_locations()] + self.itempool
 
     def find_item_locations(self, item, player: int, resolve_group_locations: bool = False) -> List[Location]:
-        if resolve_group_locations:
-            player_groups = self.get_player_groups(player)
-            return [location for location in self.get_locations() if
-                    location.item and location.item.name == item and location.player not in player_groups and
-                    (location.item.player == player or location.item.player in player_groups)]
-        return [location for location in self.get_locations() if
-                location.item and location.item.name == item and location.item.player == player]
+        return self.find_items_in_locations({item}, player, resolve_group_locations)
 
     def find_item(self, item, player: int) -> Location:
-        return next(location for location in self.get_locations() if
-                    location.item and location.item.name == item and location.item.player == player)
+        return next(iter(self.regions.get_item_locations((item,), (player,))))
 
     def find_items_in_locations(self, items: Set[str], player: int, resolve_group_locations: bool = False) -> List[Location]:
         if resolve_group_locations:
             player_groups = self.get_player_groups(player)
-            return [location for location in self.get_locations() if
-                    location.item and location.item.name in items and location.player not in player_groups and
-                    (location.item.player == player or location.item.player in player_groups)]
-        return [location for location in self.get_locations() if
-                location.item and location.item.name in items and location.item.player == player]
+            return [location for location in self.regions.get_item_locations(items, (player, *player_groups))
+                    if location.player not in player_groups]
+        return self.regions.get_item_locations(items, (player,))
 
     def create_item(self, item_name: str, player: int) -> Item:
         return self.worlds[player].create_item(item_name)
@@ -467,10 +608,10 @@ class MultiWorld():
                                            for player in self.regions.location_cache))
 
     def get_unfilled_locations(self, player: Optional[int] = None) -> List[Location]:
-        return [location for location in self.get_locations(player) if location.item is None]
+        return self.regions.get_unfilled_locations(self.regions.location_cache if player is None else (player,))
 
     def get_filled_locations(self, player: Optional[int] = None) -> List[Location]:
-        return [location for location in self.get_locations(player) if location.item is not None]
+        return self.regions.get_filled_locations(self.regions.location_cache if player is None else (player,))
 
     def get_reachable_locations(self, state: Optional[CollectionState] = None, player: Optional[int] = None) -> List[Location]:
         state: CollectionState = state if state else self.state
@@ -478,7 +619,7 @@ class MultiWorld():
 
     def get_placeable_locations(self, state=None, player=None) -> List[Location]:
         state: CollectionState = state if state else self.state
-        return [location for location in self.get_locations(player) if location.item is None and location.can_reach(state)]
+        return [location for location in self.get_unfilled_locations(player) if location.can_reach(state)]
 
     def get_unfilled_locations_for_players(self, location_names: List[str], players: Iterable[int]):
         for player in players:
@@ -509,24 +650,40 @@ class MultiWorld():
             return all((self.has_beaten_game(state, p) for p in range(1, self.players + 1)))
 
     def can_beat_game(self, starting_state: Optional[CollectionState] = None) -> bool:
-        if starting_state:
-            if self.has_beaten_game(starting_state):
-                return True
-            state = starting_state.copy()
-        else:
+        if not starting_state:
             if self.has_beaten_game(self.state):
                 return True
-            state = CollectionState(self)
-        prog_locations = {location for location in self.get_locations() if location.item
-                          and location.item.advancement and location not in state.locations_checked}
+            return self.sphere_cache.get_sweep(progression_only=True).beats_game()
 
-        while prog_locations:
-            sphere: Set[Location] = set()
-            # build up spheres of collection radius.
-            # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-            for location in prog_locations:
-                if location.can_reach(state):
-                    sphere.add(location)
+        if self.has_beaten_game(starting_state):
+            return True
+        prog_locations = [location for location in self.get_locations() if location.item
+                          and location.item.advancement and location not in starting_state.locations_checked]
+        return self._can_beat_game_from(starting_state.copy(), prog_locations)
+
+    def _can_beat_game_from(self, state: CollectionState, prog_locations: List[Location]) -> bool:
+        """Collects prog_locations into state sphere by sphere, until the game is beaten or nothing is left."""
+        # only the outcome matters here, so locations are grouped by parent region,
+        # which lets whole regions that can't be reached yet be skipped without evaluating their locations' rules
+        pending: Dict[Optional[Region], List[Location]] = {}
+        for location in prog_locations:
+            pending.setdefault(location.parent_region, []).append(location)
+
+        while pending:
+            sphere: List[Location] = []
+            for region, region_locations in tuple(pending.items()):
+                if region is not None and not region.can_reach(state):
+                    continue
+                remaining: List[Location] = []
+                for location in region_locations:
+                    if location.can_reach(state):
+                        sphere.append(location)
+                    else:
+                        remaining.append(location)
+                if remaining:
+                    pending[region] = remaining
+                else:
+                    del pending[region]
 
             if not sphere:
                 # ran out of places and did not finish yet, quit
@@ -534,7 +691,6 @@ class MultiWorld():
 
             for location in sphere:
                 state.collect(location.item, True, location)
-            prog_locations -= sphere
 
             if self.has_beaten_game(state):
                 return True
@@ -549,29 +705,15 @@ class MultiWorld():
         locations is followed by an empty set, and then a set of all of the
         unreachable locations.
         """
-        state = CollectionState(self)
-        locations = set(self.get_filled_locations())
-
-        while locations:
-            sphere: Set[Location] = set()
-
-            for location in locations:
-                if location.can_reach(state):
-                    sphere.add(location)
-            yield sphere
-            if not sphere:
-                if locations:
-                    yield locations  # unreachable locations
-                break
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-            locations -= sphere
+        sweep = self.sphere_cache.get_sweep(progression_only=False)
+        for sphere in sweep:
+            yield set(sphere)
+        if sweep.remaining:
+            yield set()
+            yield set(sweep.remaining)  # unreachable locations
 
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
         """Check if accessibility rules are fulfilled with current or supplied state."""
-        if not state:
-            state = CollectionState(self)
         players: Dict[str, Set[int]] = {
             "minimal": set(),
             "items": set(),
@@ -607,6 +749,17 @@ class MultiWorld():
 
         locations = [location for location in self.get_locations() if location_relevant(location)]
 
+        if not state:
+            # the final state of the shared progression sweep has every reachable advancement item collected
+            state = self.sphere_cache.get_sweep(progression_only=True).finish()
+            unreachable = [location for location in locations if not location.can_reach(state)]
+            if self.has_beaten_game(state) and not any(map(location_condition, unreachable)):
+                return True
+            if unreachable:
+                logging.warning(f"Could not access required locations for accessibility check."
+                                f" Missing: {unreachable}")
+            return False
+
         while locations:
             sphere: List[Location] = []
             for n in range(len(locations) - 1, -1, -1):
@@ -635,27 +788,182 @@ class MultiWorld():
 PathValue = Tuple[str, Optional["PathValue"]]
 
 
+class IndexedCounter(MutableMapping):
+    """
+    Counter replacement for a player's collected items, storing the counts of the world's item names in an array at
+    the index given by World.item_name_to_index. Names unknown to the world, like events, go into an overflow Counter.
+    """
+    __slots__ = ("indices", "group_indices", "counts", "overflow")
+    indices: Dict[str, int]
+    group_indices: Dict[str, Tuple[Tuple[int, ...], Tuple[str, ...]]]
+    counts: array
+    overflow: Optional[Counter[str]]
+
+    def __init__(self, indices: Dict[str, int],
+                 group_indices: Dict[str, Tuple[Tuple[int, ...], Tuple[str, ...]]]) -> None:
+        self.indices = indices
+        self.group_indices = group_indices
+        self.counts = array("i", bytes(len(indices) * array("i").itemsize))
+        self.overflow = None
+
+    def __getitem__(self, name: str) -> int:
+        try:
+            return self.counts[self.indices[name]]
+        except KeyError:
+            return self.overflow[name] if self.overflow else 0
+
+    def __setitem__(self, name: str, value: int) -> None:
+        index = self.indices.get(name)
+        if index is not None:
+            self.counts[index] = value
+        elif self.overflow is None:
+            self.overflow = Counter({name: value})
+        else:
+            self.overflow[name] = value
+
+    def __delitem__(self, name: str) -> None:
+        index = self.indices.get(name)
+        if index is not None:
+            self.counts[index] = 0
+        elif self.overflow:
+            del self.overflow[name]
+
+    def __iter__(self) -> Iterator[str]:
+        names = iter(self.indices)
+        for count in self.counts:
+            name = next(names)
+            if count:
+                yield name
+        if self.overflow:
+            yield from self.overflow
+
+    def __len__(self) -> int:
+        return len(self.counts) - self.counts.count(0) + (len(self.overflow) if self.overflow else 0)
+
+    def __contains__(self, name: object) -> bool:
+        index = self.indices.get(name)
+        if index is not None:
+            return self.counts[index] != 0
+        return bool(self.overflow) and name in self.overflow
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self[name] if name in self else default
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({dict(self.items())!r})"
+
+    def copy(self) -> IndexedCounter:
+        ret = IndexedCounter.__new__(IndexedCounter)
+        ret.indices = self.indices
+        ret.group_indices = self.group_indices
+        ret.counts = self.counts[:]
+        ret.overflow = self.overflow.copy() if self.overflow else None
+        return ret
+
+    def count_group(self, item_name_group: str) -> int:
+        """Sum of the counts of all items in the world's item name group."""
+        indices, unindexed_names = self.group_indices[item_name_group]
+        found = sum(map(self.counts.__getitem__, indices))
+        if unindexed_names and self.overflow:
+            found += sum(map(self.overflow.__getitem__, unindexed_names))
+        return found
+
+
+class IndexedSet(MutableSet):
+    """
+    Set of one player's Regions or Entrances, stored as a flag per index in the RegionManager.
+    Copying only copies the flags, testing membership is a single lookup without hashing.
+    """
+    __slots__ = ("members", "flags")
+    members: List[Any]
+    flags: bytearray
+
+    def __init__(self, members: List[Any], iterable: Iterable[Any] = ()) -> None:
+        self.members = members
+        self.flags = bytearray(len(members))
+        for value in iterable:
+            self.add(value)
+
+    def fit(self) -> None:
+        """Makes room for the flags of members added since this set was created."""
+        if len(self.flags) < len(self.members):
+            self.flags.extend(bytes(len(self.members) - len(self.flags)))
+
+    def __contains__(self, value: object) -> bool:
+        index = getattr(value, "index", -1)
+        return 0 <= index < len(self.flags) and self.flags[index] != 0 and self.members[index] is value
+
+    def __iter__(self) -> Iterator[Any]:
+        return map(self.members.__getitem__, itertools.compress(range(len(self.flags)), self.flags))
+
+    def __len__(self) -> int:
+        return len(self.flags) - self.flags.count(0)
+
+    def add(self, value: Any) -> None:
+        assert 0 <= value.index < len(self.members) and self.members[value.index] is value, \
+            f"{value} is not indexed by this set."
+        self.fit()
+        self.flags[value.index] = 1
+
+    def discard(self, value: Any) -> None:
+        if value in self:
+            self.flags[value.index] = 0
+
+    def remove(self, value: Any) -> None:
+        if value not in self:
+            raise KeyError(value)
+        self.flags[value.index] = 0
+
+    def clear(self) -> None:
+        self.flags = bytearray(len(self.members))
+
+    def update(self, *iterables: Iterable[Any]) -> None:
+        for iterable in iterables:
+            for value in iterable:
+                self.add(value)
+
+    def difference(self, *iterables: Iterable[Any]) -> Set[Any]:
+        return set(self).difference(*iterables)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({set(self)!r})"
+
+    def copy(self) -> IndexedSet:
+        ret = IndexedSet.__new__(IndexedSet)
+        ret.members = self.members
+        ret.flags = self.flags[:]
+        return ret
+
+
 class CollectionState():
-    prog_items: Dict[int, Counter[str]]
+    _prog_items: Utils.CopyOnWriteDict  # Dict[int, Counter[str]], exposed as prog_items
     multiworld: MultiWorld
-    reachable_regions: Dict[int, Set[Region]]
-    blocked_connections: Dict[int, Set[Entrance]]
+    reachable_regions: Dict[int, IndexedSet]  # Dict[int, Set[Region]]
+    blocked_connections: Dict[int, IndexedSet]  # Dict[int, Set[Entrance]]
     events: Set[Location]
     path: Dict[Union[Region, Entrance], PathValue]
     locations_checked: Set[Location]
     stale: Dict[int, bool]
+    _changed_items: Dict[int, Set[str]]  # item names collected per player since its last reachability update
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
     def __init__(self, parent: MultiWorld):
-        self.prog_items = {player: Counter() for player in parent.get_all_ids()}
+        self._prog_items = Utils.CopyOnWriteDict(operator.methodcaller("copy"),
+                                                 {player: self._new_item_counter(parent, player)
+                                                  for player in parent.get_all_ids()})
         self.multiworld = parent
-        self.reachable_regions = {player: set() for player in parent.get_all_ids()}
-        self.blocked_connections = {player: set() for player in parent.get_all_ids()}
+        self.reachable_regions = Utils.CopyOnWriteDict(operator.methodcaller("copy"), {
+            player: IndexedSet(parent.regions.indexed_regions.setdefault(player, []))
+            for player in parent.get_all_ids()})
+        self.blocked_connections = Utils.CopyOnWriteDict(operator.methodcaller("copy"), {
+            player: IndexedSet(parent.regions.indexed_entrances.setdefault(player, []))
+            for player in parent.get_all_ids()})
         self.events = set()
         self.path = {}
         self.locations_checked = set()
         self.stale = {player: True for player in parent.get_all_ids()}
+        self._changed_items = {}
         for function in self.additional_init_functions:
             function(self, parent)
         for items in parent.precollected_items.values():
@@ -664,46 +972,91 @@ class CollectionState():
 
     def update_reachable_regions(self, player: int):
         self.stale[player] = False
+        changed_items = self._changed_items.pop(player, None)
+        self._changed_items[player] = set()
         reachable_regions = self.reachable_regions[player]
         blocked_connections = self.blocked_connections[player]
-        queue = deque(self.blocked_connections[player])
+        # worlds may reset reachability by assigning a plain set
+        if not isinstance(reachable_regions, IndexedSet):
+            reachable_regions = self.reachable_regions[player] = \
+                IndexedSet(self.multiworld.regions.indexed_regions[player], reachable_regions)
+        if not isinstance(blocked_connections, IndexedSet):
+            blocked_connections = self.blocked_connections[player] = \
+                IndexedSet(self.multiworld.regions.indexed_entrances[player], blocked_connections)
+        reachable_regions.fit()
+        blocked_connections.fit()
+        reachable_flags = reachable_regions.flags
+        blocked_flags = blocked_connections.flags
         start = self.multiworld.get_region("Menu", player)
 
         # init on first call - this can't be done on construction since the regions don't exist yet
-        if start not in reachable_regions:
+        if not reachable_flags[start.index]:
+            queue = deque(blocked_connections)
             reachable_regions.add(start)
             blocked_connections.update(start.exits)
             queue.extend(start.exits)
+        elif changed_items is None:
+            queue = deque(blocked_connections)
+        else:
+            # only retry connections whose rule may read one of the changed items
+            undeclared, dependents = self.multiworld.regions.get_entrance_dependents(player)
+            retry = set(itertools.compress(range(len(blocked_flags)), map(operator.and_, blocked_flags, undeclared))) \
+                if undeclared else set()
+            for item_name in changed_items:
+                retry.update(index for index in dependents.get(item_name, ()) if blocked_flags[index])
+            queue = deque(map(blocked_connections.members.__getitem__, sorted(retry)))
 
         # run BFS on all connections, and keep track of those blocked by missing items
         while queue:
             connection = queue.popleft()
             new_region = connection.connected_region
-            if new_region in reachable_regions:
-                blocked_connections.remove(connection)
+            if new_region and reachable_flags[new_region.index]:
+                blocked_flags[connection.index] = 0
             elif connection.can_reach(self):
                 assert new_region, f"tried to search through an Entrance \"{connection}\" with no Region"
-                reachable_regions.add(new_region)
-                blocked_connections.remove(connection)
-                blocked_connections.update(new_region.exits)
+                reachable_flags[new_region.index] = 1
+                blocked_flags[connection.index] = 0
+                for new_exit in new_region.exits:
+                    assert new_exit.index >= 0, f"{new_exit} is not indexed by the RegionManager."
+                    blocked_flags[new_exit.index] = 1
                 queue.extend(new_region.exits)
                 self.path[new_region] = (new_region.name, self.path.get(connection, None))
 
                 # Retry connections if the new region can unblock them
                 for new_entrance in self.multiworld.indirect_connections.get(new_region, set()):
-                    if new_entrance in blocked_connections and new_entrance not in queue:
+                    if blocked_flags[new_entrance.index] and new_entrance not in queue:
                         queue.append(new_entrance)
 
+    @staticmethod
+    def _new_item_counter(multiworld: MultiWorld, player: int) -> Union[Counter[str], IndexedCounter]:
+        world = multiworld.worlds.get(player, None)
+        if world and world.indexed_item_counts:
+            return IndexedCounter(world.item_name_to_index, world.item_name_group_indices)
+        return Counter()
+
+    @property
+    def prog_items(self) -> Dict[int, Counter[str]]:
+        return self._prog_items
+
+    @prog_items.setter
+    def prog_items(self, value: Dict[int, Counter[str]]) -> None:
+        self._prog_items = value if isinstance(value, Utils.CopyOnWriteDict) \
+            else Utils.CopyOnWriteDict(operator.methodcaller("copy"), dict(value))
+
     def copy(self) -> CollectionState:
-        ret = CollectionState(self.multiworld)
-        ret.prog_items = copy.deepcopy(self.prog_items)
-        ret.reachable_regions = {player: copy.copy(self.reachable_regions[player]) for player in
-                                 self.reachable_regions}
-        ret.blocked_connections = {player: copy.copy(self.blocked_connections[player]) for player in
-                                   self.blocked_connections}
+        """Forks this state. Per-player data is shared between both states until either one writes to it."""
+        ret = CollectionState.__new__(CollectionState)
+        ret.multiworld = self.multiworld
+        ret._prog_items = self._prog_items.fork()
+        ret.reachable_regions = self.reachable_regions.fork()
+        ret.blocked_connections = self.blocked_connections.fork()
         ret.events = copy.copy(self.events)
         ret.path = copy.copy(self.path)
         ret.locations_checked = copy.copy(self.locations_checked)
+        ret.stale = dict.fromkeys(self.stale, True)
+        ret._changed_items = {player: set(changed_items) for player, changed_items in self._changed_items.items()}
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
         for function in self.additional_copy_functions:
             ret = function(self, ret)
         return ret
@@ -734,34 +1087,71 @@ class CollectionState():
         return self.multiworld.get_region(spot, player).can_reach(self)
 
     def sweep_for_events(self, key_only: bool = False, locations: Optional[Iterable[Location]] = None) -> None:
+        """
+        Collects all reachable events, until no more can be reached.
+        After the first pass only events of players that collected something in the previous pass are re-tested.
+        Like update_reachable_regions, this relies on a player's logic only depending on that player's items.
+        Events with declared access_dependencies are only re-tested once the count of one of those items changed.
+        """
         if locations is None:
             locations = self.multiworld.get_filled_locations()
-        reachable_events = True
         # since the loop has a good chance to run more than once, only filter the events once
-        locations = {location for location in locations if location.event and location not in self.events and
-                     not key_only or getattr(location.item, "locked_dungeon_item", False)}
-        while reachable_events:
-            reachable_events = {location for location in locations if location.can_reach(self)}
-            locations -= reachable_events
+        # pending events by player and parent region, in a dict to keep them unique and ordered,
+        # mapped to the counts of their rule's dependencies when it last failed
+        pending: Dict[int, Dict[Optional[Region], Dict[Location, Optional[Tuple[int, ...]]]]] = {}
+        for location in locations:
+            if location.event and location not in self.events and not key_only \
+                    or getattr(location.item, "locked_dungeon_item", False):
+                pending.setdefault(location.player, {}).setdefault(location.parent_region, {})[location] = None
+        players_to_check: Iterable[int] = tuple(pending)
+        while players_to_check:
+            reachable_events: List[Location] = []
+            for player in players_to_check:
+                player_pending = pending[player]
+                player_prog_items = self._prog_items.view[player]
+                for region, region_events in tuple(player_pending.items()):
+                    # a region that can't be reached doesn't need its events' rules evaluated
+                    if region is not None and not region.can_reach(self):
+                        continue
+                    for location, last_counts in tuple(region_events.items()):
+                        dependencies = location.access_dependencies
+                        if dependencies is not None and dependencies[0] is location.access_rule:
+                            counts = tuple([player_prog_items[item_name] for item_name in dependencies[1]])
+                            if counts == last_counts:
+                                continue
+                        else:
+                            counts = None
+                        if location.can_reach(self):
+                            reachable_events.append(location)
+                            del region_events[location]
+                        elif counts is not None:
+                            region_events[location] = counts
+                    if not region_events:
+                        del player_pending[region]
+            players_to_check = set()
             for event in reachable_events:
                 self.events.add(event)
                 assert isinstance(event.item, Item), "tried to collect Event with no Item"
                 self.collect(event.item, True, event)
+                if pending.get(event.item.player, None):
+                    players_to_check.add(event.item.player)
 
     # item name related
     def has(self, item: str, player: int, count: int = 1) -> bool:
-        return self.prog_items[player][item] >= count
+        return self._prog_items.view[player][item] >= count
 
     def has_all(self, items: Iterable[str], player: int) -> bool:
         """Returns True if each item name of items is in state at least once."""
-        return all(self.prog_items[player][item] for item in items)
+        player_prog_items = self._prog_items.view[player]
+        return all(player_prog_items[item] for item in items)
 
     def has_any(self, items: Iterable[str], player: int) -> bool:
         """Returns True if at least one item name of items is in state at least once."""
-        return any(self.prog_items[player][item] for item in items)
+        player_prog_items = self._prog_items.view[player]
+        return any(player_prog_items[item] for item in items)
 
     def count(self, item: str, player: int) -> int:
-        return self.prog_items[player][item]
+        return self._prog_items.view[player][item]
 
     def item_count(self, item: str, player: int) -> int:
         Utils.deprecate("Use count instead.")
@@ -770,7 +1160,9 @@ class CollectionState():
     # item name group related
     def has_group(self, item_name_group: str, player: int, count: int = 1) -> bool:
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.view[player]
+        if isinstance(player_prog_items, IndexedCounter):
+            return player_prog_items.count_group(item_name_group) >= count
         for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
             found += player_prog_items[item_name]
             if found >= count:
@@ -779,7 +1171,9 @@ class CollectionState():
 
     def count_group(self, item_name_group: str, player: int) -> int:
         found: int = 0
-        player_prog_items = self.prog_items[player]
+        player_prog_items = self._prog_items.view[player]
+        if isinstance(player_prog_items, IndexedCounter):
+            return player_prog_items.count_group(item_name_group)
         for item_name in self.multiworld.worlds[player].item_name_groups[item_name_group]:
             found += player_prog_items[item_name]
         return found
@@ -792,8 +1186,11 @@ class CollectionState():
         changed = self.multiworld.worlds[item.player].collect(self, item)
 
         if not changed and event:
-            self.prog_items[item.player][item.name] += 1
+            self._prog_items[item.player][item.name] += 1
+            self.note_item_change(item.player, item.name)
             changed = True
+        elif changed and not self.multiworld.worlds[item.player].tracks_item_changes:
+            self._changed_items.pop(item.player, None)
 
         self.stale[item.player] = True
 
@@ -806,26 +1203,187 @@ class CollectionState():
         changed = self.multiworld.worlds[item.player].remove(self, item)
         if changed:
             # invalidate caches, nothing can be trusted anymore now
-            self.reachable_regions[item.player] = set()
-            self.blocked_connections[item.player] = set()
-            self.stale[item.player] = True
+            self.reset_reachability(item.player)
+
+    def reset_reachability(self, player: int, subset_state: Optional[CollectionState] = None) -> None:
+        """
+        Discards the reachability cached for player, for example after items were taken away.
+        :param subset_state: a state holding a subset of this state's items, its reachability is kept as a head start.
+        """
+        if subset_state:
+            self.reachable_regions[player] = subset_state.reachable_regions[player].copy()
+            self.blocked_connections[player] = subset_state.blocked_connections[player].copy()
+        else:
+            self.reachable_regions[player] = set()
+            self.blocked_connections[player] = set()
+        self.stale[player] = True
+        self._changed_items.pop(player, None)
+
+    def note_item_change(self, player: int, item_name: str) -> None:
+        """Records that the count of item_name changed, so only rules depending on it are re-evaluated."""
+        changed_items = self._changed_items.get(player, None)
+        if changed_items is not None:
+            changed_items.add(item_name)
+
+
+class SphereSweep:
+    """
+    One lazily computed sweep over the filled locations of a multiworld, or only those holding advancement items.
+    spheres[n] holds the locations first reachable after collecting every earlier sphere,
+    states[n] is the state after collecting spheres 0 up to and including n.
+    Iterating yields spheres, computing further ones only when they are asked for.
+    Sweeps are shared between output threads, so states are only handed out as copies made under the lock.
+    """
+    state: CollectionState
+    remaining: Set[Location]
+    spheres: List[FrozenSet[Location]]
+    states: List[CollectionState]
+    sphere_numbers: Dict[Location, int]
+    finished: bool
+    beaten_sphere: Optional[int]
+    """number of the first sphere after which the game is beaten, None if it isn't after the spheres so far"""
+
+    def __init__(self, multiworld: MultiWorld, progression_only: bool) -> None:
+        self.state = CollectionState(multiworld)
+        self.remaining = {location for location in multiworld.get_filled_locations()
+                          if not progression_only or location.item.advancement}
+        self.spheres = []
+        self.states = []
+        self.sphere_numbers = {}
+        self.finished = not self.remaining
+        self.beaten_sphere = None
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[FrozenSet[Location]]:
+        number = 0
+        while self._advance(number):
+            yield self.spheres[number]
+            number += 1
+
+    def _advance(self, number: int) -> bool:
+        """Makes sure sphere number is computed, returns False if the sweep ran out of reachable locations before."""
+        with self._lock:
+            if number < len(self.spheres):
+                return True
+            if self.finished:
+                return False
+            state = self.state
+            sphere = frozenset(location for location in self.remaining if location.can_reach(state))
+            if not sphere:
+                self.finished = True
+                return False
+            for location in sphere:
+                state.collect(location.item, True, location)
+            self.remaining -= sphere
+            self.sphere_numbers.update(dict.fromkeys(sphere, len(self.spheres)))
+            self.spheres.append(sphere)
+            self.states.append(state.copy())
+            if self.beaten_sphere is None and state.multiworld.has_beaten_game(state):
+                self.beaten_sphere = len(self.spheres) - 1
+            self.finished = not self.remaining
+            return True
+
+    def _finish(self) -> None:
+        for _ in self:
+            pass
+
+    def finish(self) -> CollectionState:
+        """Computes all remaining spheres and returns a copy of the final state."""
+        self._finish()
+        with self._lock:
+            return self.state.copy()
+
+    def get_state(self, number: int) -> CollectionState:
+        """Returns a copy of the state after collecting spheres 0 up to and including number."""
+        if not self._advance(number):
+            raise IndexError(f"Sphere {number} is not reachable.")
+        with self._lock:
+            return self.states[number].copy()
+
+    def beats_game(self) -> bool:
+        """Whether the game is beaten after some sphere, computing spheres only until it is."""
+        for _ in self:
+            if self.beaten_sphere is not None:
+                return True
+        return self.beaten_sphere is not None
+
+    def get_sphere_number(self, location: Location) -> Optional[int]:
+        """Sphere number of location, None if it is not reachable. Computes all remaining spheres."""
+        self._finish()
+        return self.sphere_numbers.get(location)
+
+
+class SphereCache:
+    """
+    Shares sphere sweeps over the current placement between can_beat_game, get_spheres, fulfills_accessibility and
+    the spoiler playthrough. Sweeps are dropped as soon as an item moves or gets precollected.
+    Call invalidate after changing logic or item classifications without moving items.
+    """
+    multiworld: MultiWorld
+    _placement: Optional[Tuple[int, Tuple[Any, ...], Tuple[Item, ...]]]
+    _sweeps: Dict[bool, SphereSweep]
+
+    def __init__(self, multiworld: MultiWorld) -> None:
+        self.multiworld = multiworld
+        self._lock = threading.Lock()
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._placement = None
+            self._sweeps = {}
+
+    def get_sweep(self, progression_only: bool) -> SphereSweep:
+        """:param progression_only: only sweep locations holding advancement items, like the playthrough does."""
+        multiworld = self.multiworld
+        regions = multiworld.regions
+        # locations without a parent_region can't raise the placement version, so their items are compared instead.
+        # Precollected items are compared as well, as they get removed from precollected_items directly.
+        placement = (regions.placement_version,
+                     tuple((location, location.item) for location in regions.detached_locations),
+                     tuple(item for items in multiworld.precollected_items.values() for item in items))
+        with self._lock:
+            if placement != self._placement:
+                self._placement = placement
+                self._sweeps = {}
+            sweep = self._sweeps.get(progression_only)
+            if sweep is None:
+                sweep = self._sweeps[progression_only] = SphereSweep(multiworld, progression_only)
+            return sweep
 
 
 class Entrance:
+    __slots__ = ("player", "name", "parent_region", "connected_region", "index", "addresses", "target", "__dict__")
     access_rule: Callable[[CollectionState], bool] = staticmethod(lambda state: True)
+    access_dependencies: Optional[Tuple[Callable[[CollectionState], bool], FrozenSet[str]]] = None
+    """(access_rule, item names it reads), ignored once access_rule is replaced. Set by worlds.generic.Rules"""
+    rule_version: ClassVar[int] = 0
+    """raised whenever the access_rule or access_dependencies of any Entrance get set"""
     hide_path: bool = False
     player: int
     name: str
     parent_region: Optional[Region]
-    connected_region: Optional[Region] = None
+    connected_region: Optional[Region]
+    index: int
+    """dense index per player, assigned by the RegionManager once added to a Region's exits"""
     # LttP specific, TODO: should make a LttPEntrance
-    addresses = None
-    target = None
+    addresses: Any
+    target: Any
 
     def __init__(self, player: int, name: str = '', parent: Region = None):
         self.name = name
         self.parent_region = parent
         self.player = player
+        self.connected_region = None
+        self.index = -1
+        self.addresses = None
+        self.target = None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name == "access_rule" or name == "access_dependencies":
+            # the reverse index of RegionManager.get_entrance_dependents is rebuilt on the next use
+            Entrance.rule_version += 1
+        super().__setattr__(name, value)
 
     def can_reach(self, state: CollectionState) -> bool:
         if self.parent_region.can_reach(state) and self.access_rule(state):
@@ -850,9 +1408,12 @@ class Entrance:
 
 
 class Region:
+    __slots__ = ("name", "_hint_text", "player", "index", "multiworld", "entrances", "_exits", "_locations", "__dict__")
     name: str
     _hint_text: str
     player: int
+    index: int
+    """dense index per player, assigned by the RegionManager on creation"""
     multiworld: Optional[MultiWorld]
     entrances: List[Entrance]
     exits: List[Entrance]
@@ -860,6 +1421,7 @@ class Region:
     entrance_type: ClassVar[Type[Entrance]] = Entrance
 
     class Register(MutableSequence):
+        __slots__ = ("_list", "region_manager")
         region_manager: MultiWorld.RegionManager
 
         def __init__(self, region_manager: MultiWorld.RegionManager):
@@ -883,18 +1445,24 @@ class Region:
             return self._list.copy()
 
     class LocationRegister(Register):
+        __slots__ = ()
+
         def __delitem__(self, index: int) -> None:
             location: Location = self._list.__getitem__(index)
             self._list.__delitem__(index)
             del(self.region_manager.location_cache[location.player][location.name])
+            self.region_manager.unindex_location(location)
 
         def insert(self, index: int, value: Location) -> None:
             assert value.name not in self.region_manager.location_cache[value.player], \
                 f"{value.name} already exists in the location cache."
             self._list.insert(index, value)
             self.region_manager.location_cache[value.player][value.name] = value
+            self.region_manager.index_location(value)
 
     class EntranceRegister(Register):
+        __slots__ = ()
+
         def __delitem__(self, index: int) -> None:
             entrance: Entrance = self._list.__getitem__(index)
             self._list.__delitem__(index)
@@ -905,6 +1473,8 @@ class Region:
                 f"{value.name} already exists in the entrance cache."
             self._list.insert(index, value)
             self.region_manager.entrance_cache[value.player][value.name] = value
+            if value.index < 0:
+                self.region_manager.index_entrance(value)
 
     _locations: LocationRegister[Location]
     _exits: EntranceRegister[Entrance]
@@ -917,6 +1487,7 @@ class Region:
         self.multiworld = multiworld
         self._hint_text = hint
         self.player = player
+        multiworld.regions.index_region(self)
 
     def get_locations(self):
         return self._locations
@@ -943,7 +1514,11 @@ class Region:
     def can_reach(self, state: CollectionState) -> bool:
         if state.stale[self.player]:
             state.update_reachable_regions(self.player)
-        return self in state.reachable_regions[self.player]
+        reachable_regions = state.reachable_regions.view[self.player]
+        try:
+            return reachable_regions.flags[self.index] != 0
+        except (AttributeError, IndexError):
+            return self in reachable_regions
 
     @property
     def hint_text(self) -> str:
@@ -1023,6 +1598,7 @@ class LocationProgressType(IntEnum):
 
 
 class Location:
+    __slots__ = ("player", "name", "address", "parent_region", "_item", "index", "__dict__")
     game: str = "Generic"
     player: int
     name: str
@@ -1034,14 +1610,32 @@ class Location:
     progress_type: LocationProgressType = LocationProgressType.DEFAULT
     always_allow = staticmethod(lambda state, item: False)
     access_rule: Callable[[CollectionState], bool] = staticmethod(lambda state: True)
+    access_dependencies: Optional[Tuple[Callable[[CollectionState], bool], FrozenSet[str]]] = None
+    """(access_rule, item names it reads), ignored once access_rule is replaced. Set by worlds.generic.Rules"""
     item_rule = staticmethod(lambda item: True)
-    item: Optional[Item] = None
+    _item: Optional[Item]
+    index: int
+    """dense index per player, assigned by the RegionManager when added to a Region's locations"""
 
     def __init__(self, player: int, name: str = '', address: Optional[int] = None, parent: Optional[Region] = None):
         self.player = player
         self.name = name
         self.address = address
         self.parent_region = parent
+        self._item = None
+        self.index = -1
+
+    def get_item(self) -> Optional[Item]:
+        return self._item
+
+    def set_item(self, item: Optional[Item]) -> None:
+        self._item = item
+        if self.parent_region and self.parent_region.multiworld:
+            regions = self.parent_region.multiworld.regions
+            regions.changed_locations.append(self)
+            regions.placement_version += 1
+
+    item = property(get_item, set_item)
 
     def can_fill(self, state: CollectionState, item: Item, check_access=True) -> bool:
         return ((self.always_allow(state, item) and item.name not in state.multiworld.non_local_items[item.player])
@@ -1210,44 +1804,51 @@ class Spoiler:
         from itertools import chain
         # get locations containing progress items
         multiworld = self.multiworld
-        prog_locations = {location for location in multiworld.get_filled_locations() if location.item.advancement}
+        sweep = multiworld.sphere_cache.get_sweep(progression_only=True)
         state_cache: List[Optional[CollectionState]] = [None]
         collection_spheres: List[Set[Location]] = []
-        state = CollectionState(multiworld)
-        sphere_candidates = set(prog_locations)
         logging.debug('Building up collection spheres.')
-        while sphere_candidates:
-
+        for number, sphere in enumerate(sweep):
             # build up spheres of collection radius.
             # Everything in each sphere is independent from each other in dependencies and only depends on lower spheres
-
-            sphere = {location for location in sphere_candidates if state.can_reach(location)}
-
-            for location in sphere:
-                state.collect(location.item, True, location)
-
-            sphere_candidates -= sphere
-            collection_spheres.append(sphere)
-            state_cache.append(state.copy())
+            collection_spheres.append(set(sphere))
+            state_cache.append(sweep.get_state(number))
 
             logging.debug('Calculated sphere %i, containing %i of %i progress items.', len(collection_spheres),
                           len(sphere),
-                          len(prog_locations))
-            if not sphere:
-                logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
-                    location.item.name, location.item.player, location.name, location.player) for location in
-                                                                               sphere_candidates])
-                if any([multiworld.accessibility[location.item.player] != 'minimal' for location in sphere_candidates]):
-                    raise RuntimeError(f'Not all progression items reachable ({sphere_candidates}). '
-                                       f'Something went terribly wrong here.')
-                else:
-                    self.unreachables = sphere_candidates
-                    break
+                          len(sweep.sphere_numbers) + len(sweep.remaining))
+
+        if sweep.remaining:
+            sphere_candidates = set(sweep.remaining)
+            logging.debug('The following items could not be reached: %s', ['%s (Player %d) at %s (Player %d)' % (
+                location.item.name, location.item.player, location.name, location.player) for location in
+                                                                           sphere_candidates])
+            if any([multiworld.accessibility[location.item.player] != 'minimal' for location in sphere_candidates]):
+                raise RuntimeError(f'Not all progression items reachable ({sphere_candidates}). '
+                                   f'Something went terribly wrong here.')
+            else:
+                self.unreachables = sphere_candidates
 
         # in the second phase, we cull each sphere such that the game is still beatable,
         # reducing each range of influence to the bare minimum required inside it
-        restore_later = {}
+        restore_later: Dict[Location, Item] = {}
+        # starting from the state before sphere num, only the locations of sphere num onwards are left to collect,
+        # so each test only sweeps those instead of filtering every location of the multiworld again
+        later_locations: List[Location] = list(sweep.remaining)
+
+        def can_beat_game(num: int) -> bool:
+            starting_state = state_cache[num]
+            if starting_state is None:
+                if multiworld.has_beaten_game(multiworld.state):
+                    return True
+                starting_state = CollectionState(multiworld)
+            elif multiworld.has_beaten_game(starting_state):
+                return True
+            return multiworld._can_beat_game_from(starting_state.copy(),
+                                                  [location for location in later_locations if location.item])
+
         for num, sphere in reversed(tuple(enumerate(collection_spheres))):
+            later_locations.extend(sphere)
             to_delete = set()
             for location in sphere:
                 # we remove the item at location and check if game is still beatable
@@ -1255,7 +1856,7 @@ class Spoiler:
                               location.item.player)
                 old_item = location.item
                 location.item = None
-                if multiworld.can_beat_game(state_cache[num]):
+                if can_beat_game(num):
                     to_delete.add(location)
                     restore_later[location] = old_item
                 else:
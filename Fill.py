@@ -1,10 +1,11 @@
+import bisect
 import collections
 import itertools
 import logging
 import typing
 from collections import Counter, deque
 
-from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld
+from BaseClasses import CollectionState, Item, ItemClassification, Location, LocationProgressType, MultiWorld
 from Options import Accessibility
 
 from worlds.AutoWorld import call_all
@@ -27,6 +28,63 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+class AssumedState:
+    """
+    base_state with every item still assumed to be collectable, kept up to date as items are taken out of or put back
+    into the assumed pool. Replaces rebuilding the state from the whole pool with sweep_from_pool for every placement.
+    Only reachability of players that lost an item is recomputed, starting from that of base_state.
+    """
+    base_state: CollectionState
+    state: CollectionState
+    # id of item -> item and name of the count it raised, None if its world doesn't track item changes.
+    # Keyed by id as items compare equal by name and player.
+    collected_names: typing.Dict[int, typing.Tuple[Item, typing.Optional[str]]]
+    rebuild_required: bool
+
+    def __init__(self, base_state: CollectionState, itempool: typing.Iterable[Item] = ()) -> None:
+        self.base_state = base_state
+        self.state = base_state.copy()
+        self.collected_names = {}
+        self.rebuild_required = False
+        for item in itempool:
+            self.add(item)
+
+    def add(self, item: Item) -> None:
+        # worlds tracking item changes collect an item as its own name, whatever the state already holds.
+        # Others may resolve it to another name depending on the order of collects, so they get rebuilt instead.
+        name = item.name if self.state.multiworld.worlds[item.player].tracks_item_changes else None
+        if not self.rebuild_required:
+            self.state.collect(item, True)
+        self.collected_names[id(item)] = item, name
+
+    def remove(self, item: Item) -> None:
+        name = self.collected_names.pop(id(item))[1]
+        if self.rebuild_required:
+            return
+        if name:
+            prog_items = self.state.prog_items[item.player]
+            prog_items[name] -= 1
+            if prog_items[name] < 1:
+                del prog_items[name]
+            self.state.reset_reachability(item.player, self.base_state)
+        else:
+            # a custom collect may have changed anything, including state outside of prog_items
+            self.rebuild_required = True
+
+    def sweep(self, additional_items: typing.Iterable[Item] = ()) -> CollectionState:
+        """Returns a copy of the assumed state with additional_items and all reachable events collected."""
+        if self.rebuild_required:
+            self.state = self.base_state.copy()
+            for item, _ in self.collected_names.values():
+                self.state.collect(item, True)
+            self.rebuild_required = False
+        new_state = self.state.copy()
+        for item in additional_items:
+            new_state.collect(item, True)
+        new_state.sweep_for_events()
+        return new_state
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -39,18 +97,28 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     :param single_player_placement: if true, can speed up placement if everything belongs to a single player
     :param lock: locations are set to locked as they are filled
     :param swap: if true, swaps of already place items are done in the event of a dead end
-    :param on_place: callback that is called when a placement happens
+    :param on_place: callback that is called when a placement happens, item_pool is up to date when it is
     :param allow_partial: only place what is possible. Remaining items will be in the item_pool list.
     :param allow_excluded: if true and placement fails, it is re-attempted while ignoring excluded on Locations
     :param name: name of this fill step for progress logging purposes
     """
     unplaced_items: typing.List[Item] = []
     placements: typing.List[Location] = []
+    # base_state with item_pool, unplaced_items are only added for the maximum exploration state
+    assumed_state = AssumedState(base_state, item_pool)
+    # swap candidate (location, unsafe) -> its swap state and reachable location count, until the next placement
+    swap_states: typing.Dict[typing.Tuple[int, bool], typing.Tuple[CollectionState, int]] = {}
     cleanup_required = False
     swapped_items: typing.Counter[typing.Tuple[int, str, bool]] = Counter()
     reachable_items: typing.Dict[int, typing.Deque[Item]] = {}
     for item in item_pool:
         reachable_items.setdefault(item.player, deque()).append(item)
+    # item_pool with taken items replaced by None, written back before on_place and once placement is done.
+    # Items are found through the positions of each item instance instead of scanning for them.
+    pool_slots: typing.List[typing.Optional[Item]] = list(item_pool)
+    pool_positions: typing.Dict[int, typing.Deque[int]] = {}
+    for p, item in enumerate(pool_slots):
+        pool_positions.setdefault(id(item), deque()).append(p)
 
     # for progress logging
     total = min(len(item_pool), len(locations))
@@ -61,12 +129,10 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
         items_to_place = [items.pop()
                           for items in reachable_items.values() if items]
         for item in items_to_place:
-            for p, pool_item in enumerate(item_pool):
-                if pool_item is item:
-                    item_pool.pop(p)
-                    break
-        maximum_exploration_state = sweep_from_pool(
-            base_state, item_pool + unplaced_items)
+            pool_slots[pool_positions[id(item)].popleft()] = None
+            assumed_state.remove(item)
+        maximum_exploration_state = assumed_state.sweep(unplaced_items)
+        swap_states.clear()
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
 
@@ -112,7 +178,12 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
 
                         location.item = None
                         placed_item.location = None
-                        swap_state = sweep_from_pool(base_state, [placed_item, *item_pool] if unsafe else item_pool)
+                        cached_swap = swap_states.get((id(location), unsafe), None)
+                        if cached_swap:
+                            swap_state, prev_loc_count = cached_swap
+                        else:
+                            swap_state = assumed_state.sweep([placed_item] if unsafe else ())
+                            prev_loc_count = -1
                         # unsafe means swap_state assumes we can somehow collect placed_item before item_to_place
                         # by continuing to swap, which is not guaranteed. This is unsafe because there is no mechanic
                         # to clean that up later, so there is a chance generation fails.
@@ -120,13 +191,14 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                                 and location.can_fill(swap_state, item_to_place, perform_access_check):
 
                             # Verify placing this item won't reduce available locations, which would be a useless swap.
-                            prev_state = swap_state.copy()
-                            prev_loc_count = len(
-                                multiworld.get_reachable_locations(prev_state))
-
-                            swap_state.collect(item_to_place, True)
+                            # The count after placing stays a full scan: rules of locations rarely declare the items
+                            # they read, so any of them may change with item_to_place. The count before is cached.
+                            if prev_loc_count < 0:
+                                prev_loc_count = len(multiworld.get_reachable_locations(swap_state))
+                            new_state = swap_state.copy()
+                            new_state.collect(item_to_place, True)
                             new_loc_count = len(
-                                multiworld.get_reachable_locations(swap_state))
+                                multiworld.get_reachable_locations(new_state))
 
                             if new_loc_count >= prev_loc_count:
                                 # Add this item to the existing placement, and
@@ -138,13 +210,16 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
 
                                 reachable_items[placed_item.player].appendleft(
                                     placed_item)
-                                item_pool.append(placed_item)
+                                pool_positions.setdefault(id(placed_item), deque()).append(len(pool_slots))
+                                pool_slots.append(placed_item)
+                                assumed_state.add(placed_item)
 
                                 # cleanup at the end to hopefully get better errors
                                 cleanup_required = True
 
                                 break
 
+                        swap_states[id(location), unsafe] = swap_state, prev_loc_count
                         # Item can't be placed here, restore original item
                         location.item = placed_item
                         placed_item.location = location
@@ -157,6 +232,7 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                     unplaced_items.append(item_to_place)
                     continue
             multiworld.push_item(spot_to_fill, item_to_place, False)
+            swap_states.clear()
             spot_to_fill.locked = lock
             placements.append(spot_to_fill)
             spot_to_fill.event = item_to_place.advancement
@@ -164,11 +240,14 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             if not placed % 1000:
                 _log_fill_progress(name, placed, total)
             if on_place:
+                item_pool[:] = [item for item in pool_slots if item is not None]
                 on_place(spot_to_fill)
 
     if total > 1000:
         _log_fill_progress(name, placed, total)
 
+    item_pool[:] = [item for item in pool_slots if item is not None]
+
     if cleanup_required:
         # validate all placements and remove invalid ones
         state = sweep_from_pool(base_state, [])
@@ -221,15 +300,37 @@ def remaining_fill(multiworld: MultiWorld,
     swapped_items: typing.Counter[typing.Tuple[int, str]] = Counter()
     total = min(len(itempool),  len(locations))
     placed = 0
-    while locations and itempool:
+
+    # Locations sharing an item_rule object always give the same answer for the same kind of item,
+    # so they are grouped by rule and each rule is asked once per kind of item.
+    # Groups are kept sorted by their first location, so the first group accepting an item
+    # yields the same spot as scanning the locations in order would.
+    rule_groups: typing.Dict[typing.Callable[[Item], bool], typing.Deque[typing.Tuple[int, Location]]] = {}
+    for order, location in enumerate(locations):
+        rule_groups.setdefault(location.item_rule, deque()).append((order, location))
+    group_heads = sorted((group[0][0], rule) for rule, group in rule_groups.items())
+    remaining_locations = len(locations)
+    verdicts: typing.Dict[typing.Tuple[typing.Callable[[Item], bool], int, str, ItemClassification], bool] = {}
+
+    def item_rule_verdict(rule: typing.Callable[[Item], bool], item: Item) -> bool:
+        key = rule, item.player, item.name, item.classification
+        verdict = verdicts.get(key)
+        if verdict is None:
+            verdict = verdicts[key] = bool(rule(item))
+        return verdict
+
+    while remaining_locations and itempool:
         item_to_place = itempool.pop()
         spot_to_fill: typing.Optional[Location] = None
 
-        for i, location in enumerate(locations):
-            if location.item_rule(item_to_place):
-                # popping by index is faster than removing by content,
-                spot_to_fill = locations.pop(i)
-                # skipping a scan for the element
+        for i, (_, rule) in enumerate(group_heads):
+            if item_rule_verdict(rule, item_to_place):
+                group = rule_groups[rule]
+                spot_to_fill = group.popleft()[1]
+                del group_heads[i]
+                if group:
+                    bisect.insort(group_heads, (group[0][0], rule))
+                remaining_locations -= 1
                 break
 
         else:
@@ -247,7 +348,7 @@ def remaining_fill(multiworld: MultiWorld,
 
                 location.item = None
                 placed_item.location = None
-                if location.item_rule(item_to_place):
+                if item_rule_verdict(location.item_rule, item_to_place):
                     # Add this item to the existing placement, and
                     # add the old item to the back of the queue
                     spot_to_fill = placements.pop(i)
@@ -274,6 +375,9 @@ def remaining_fill(multiworld: MultiWorld,
         if not placed % 1000:
             _log_fill_progress(name, placed, total)
 
+    locations[:] = [location for _, location in sorted(itertools.chain.from_iterable(rule_groups.values()),
+                                                         key=lambda entry: entry[0])]
+
     if total > 1000:
         _log_fill_progress(name, placed, total)
 
@@ -604,6 +708,9 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         }
         sphere_num: int = 1
         moved_item_count: int = 0
+        # spheres following the current one, with the state they were found with, kept between balancing rounds
+        # as the next round would find the same spheres again unless items were moved
+        future_spheres: typing.List[typing.Tuple[typing.Set[Location], CollectionState]] = []
 
         def get_sphere_locations(sphere_state: CollectionState,
                                  locations: typing.Set[Location]) -> typing.Set[Location]:
@@ -651,16 +758,15 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         and item_percentage(player, reachables) < threshold_percentages[player])
                 }
                 if balancing_players:
-                    balancing_state = state.copy()
                     balancing_unchecked_locations = unchecked_locations.copy()
                     balancing_reachables = reachable_locations_count.copy()
-                    balancing_sphere = sphere_locations.copy()
+                    balancing_sphere = sphere_locations
                     candidate_items: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
+                    future_num = 0
                     while True:
                         # Check locations in the current sphere and gather progression items to swap earlier
                         for location in balancing_sphere:
                             if location.event:
-                                balancing_state.collect(location.item, True, location)
                                 player = location.item.player
                                 # only replace items that end up in another player's world
                                 if (not location.locked and not location.item.skip_in_prog_balancing and
@@ -669,7 +775,15 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                         location.progress_type != LocationProgressType.PRIORITY):
                                     candidate_items[player].add(location)
                                     logging.debug(f"Candidate item: {location.name}, {location.item.name}")
-                        balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
+                        if future_num == len(future_spheres):
+                            future_state = future_spheres[-1][1].copy() if future_spheres else state.copy()
+                            for location in balancing_sphere:
+                                if location.event:
+                                    future_state.collect(location.item, True, location)
+                            future_spheres.append(
+                                (get_sphere_locations(future_state, balancing_unchecked_locations), future_state))
+                        balancing_sphere, balancing_state = future_spheres[future_num]
+                        future_num += 1
                         for location in balancing_sphere:
                             balancing_unchecked_locations.remove(location)
                             if not location.locked:
@@ -692,25 +806,34 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         items_to_test = list(candidate_items[player])
                         items_to_test.sort()
                         multiworld.random.shuffle(items_to_test)
+                        # items are tested from the back, each test collecting the items before it,
+                        # so prefix_states[i] is swept once with the first i items instead of rebuilding every test
+                        prefix_states = [state.copy()]
+                        prefix_states[0].sweep_for_events(locations=locations_to_test)
+                        for location in items_to_test[:-1]:
+                            prefix_state = prefix_states[-1].copy()
+                            prefix_state.collect(location.item, True, location)
+                            prefix_state.sweep_for_events(locations=locations_to_test)
+                            prefix_states.append(prefix_state)
+                        player_items_to_replace: typing.List[Location] = []
                         while items_to_test:
                             testing = items_to_test.pop()
-                            reducing_state = state.copy()
-                            for location in itertools.chain((
-                                l for l in items_to_replace
-                                if l.item.player == player
-                            ), items_to_test):
-                                reducing_state.collect(location.item, True, location)
-
-                            reducing_state.sweep_for_events(locations=locations_to_test)
+                            reducing_state = prefix_states.pop()
+                            if player_items_to_replace:
+                                for location in player_items_to_replace:
+                                    reducing_state.collect(location.item, True, location)
+                                reducing_state.sweep_for_events(locations=locations_to_test)
 
                             if multiworld.has_beaten_game(balancing_state):
                                 if not multiworld.has_beaten_game(reducing_state):
                                     items_to_replace.append(testing)
+                                    player_items_to_replace.append(testing)
                             else:
                                 reduced_sphere = get_sphere_locations(reducing_state, locations_to_test)
                                 p = item_percentage(player, reachable_locations_count[player] + len(reduced_sphere))
                                 if p < threshold_percentages[player]:
                                     items_to_replace.append(testing)
+                                    player_items_to_replace.append(testing)
 
                     old_moved_item_count = moved_item_count
 
@@ -739,6 +862,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
 
                     if old_moved_item_count < moved_item_count:
                         logging.debug(f"Moved {moved_item_count} items so far\n")
+                        future_spheres.clear()
                         unlocked = {fresh for player in balancing_players for fresh in unlocked_locations[player]}
                         for location in get_sphere_locations(state, unlocked):
                             unchecked_locations.remove(location)
@@ -750,6 +874,8 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                 if location.event:
                     state.collect(location.item, True, location)
             checked_locations |= sphere_locations
+            if future_spheres:
+                del future_spheres[0]
 
             if multiworld.has_beaten_game(state):
                 break
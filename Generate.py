@@ -5,10 +5,11 @@ import logging
 import os
 import random
 import string
+import time
 import urllib.parse
 import urllib.request
 from collections import Counter
-from typing import Any, Dict, Tuple, Union
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
 import ModuleUpdate
 
@@ -20,7 +21,7 @@ import Options
 from BaseClasses import seeddigits, get_seed, PlandoOptions
 from Main import main as ERmain
 from settings import get_settings
-from Utils import parse_yamls, version_tuple, __version__, tuplize_version
+from Utils import parse_yamls_cached, version_tuple, __version__, tuplize_version
 from worlds.alttp.EntranceRandomizer import parse_arguments
 from worlds.alttp.Text import TextTable
 from worlds.AutoWorld import AutoWorldRegister
@@ -56,6 +57,17 @@ def mystery_argparse():
     parser.add_argument("--skip_output", action="store_true",
                         help="Skips generation assertion and output stages and skips multidata and spoiler output. "
                              "Intended for debugging and testing purposes.")
+    parser.add_argument("--profile_report", default=None,
+                        help="Write wall time, CPU time and peak memory of each generation stage per player to this "
+                             "path. Written as CSV if it ends in .csv, otherwise as JSON.")
+    parser.add_argument("--profile_rules", action="store_true",
+                        help="Count evaluations and time of every location and entrance access rule from fill on, "
+                             "logging the most expensive ones at the end. Slows generation down.")
+    parser.add_argument("--count", default=1, type=lambda value: max(int(value), 1),
+                        help="Generate this many seeds from the same player files, counting up from --seed and rolling "
+                             "options anew for each. Writes a summary of failures and timings to the output path.")
+    parser.add_argument("--jobs", default=1, type=lambda value: max(int(value), 1),
+                        help="Number of seeds of --count to generate at the same time, each in its own process.")
     args = parser.parse_args()
     if not os.path.isabs(args.weights_file_path):
         args.weights_file_path = os.path.join(args.player_files_path, args.weights_file_path)
@@ -76,14 +88,24 @@ def main(args=None, callback=ERmain):
         options = get_settings()
 
     seed = get_seed(args.seed)
+    if getattr(args, "count", 1) > 1:
+        Utils.init_logging(f"Generate_batch_{seed}", loglevel=args.log_level)
+        generate_batch(args, options, seed, read_player_files(args), callback)
+        return None
+
     Utils.init_logging(f"Generate_{seed}", loglevel=args.log_level)
-    random.seed(seed)
-    seed_name = get_seed_name(random)
+    return roll_and_generate(args, options, seed, read_player_files(args), callback)
 
-    if args.race:
-        logging.info("Race mode enabled. Using non-deterministic random source.")
-        random.seed()  # reset to time-based random source
 
+class PlayerFiles(NamedTuple):
+    weights_cache: Dict[str, Tuple[Any, ...]]
+    """file name or weights file path: parsed yaml documents"""
+    meta_weights: Optional[Dict[str, Any]]
+    player_files: Dict[int, str]
+    """player: file name in weights_cache"""
+
+
+def read_player_files(args) -> PlayerFiles:
     weights_cache: Dict[str, Tuple[Any, ...]] = {}
     if args.weights_file_path and os.path.exists(args.weights_file_path):
         try:
@@ -137,13 +159,26 @@ def main(args=None, callback=ERmain):
             "Provide individual player files or specify the number of players via host.yaml or --multi."
         )
 
-    logging.info(f"Generating for {args.multi} player{'s' if args.multi > 1 else ''}, "
-                 f"{seed_name} Seed {seed} with plando: {args.plando}")
-
     if not weights_cache:
         raise Exception(f"No weights found. "
                         f"Provide a general weights file ({args.weights_file_path}) or individual player files. "
                         f"A mix is also permitted.")
+    return PlayerFiles(weights_cache, meta_weights, player_files)
+
+
+def roll_and_generate(args, options, seed: int, files: PlayerFiles, callback=ERmain):
+    """Rolls the options of every player from files and generates the seed. Writes meta options into files."""
+    weights_cache, meta_weights, player_files = files
+    random.seed(seed)
+    seed_name = get_seed_name(random)
+
+    if args.race:
+        logging.info("Race mode enabled. Using non-deterministic random source.")
+        random.seed()  # reset to time-based random source
+
+    logging.info(f"Generating for {args.multi} player{'s' if args.multi > 1 else ''}, "
+                 f"{seed_name} Seed {seed} with plando: {args.plando}")
+
     erargs = parse_arguments(['--multi', str(args.multi)])
     erargs.seed = seed
     erargs.plando_options = args.plando
@@ -154,6 +189,8 @@ def main(args=None, callback=ERmain):
     erargs.outputpath = args.outputpath
     erargs.skip_prog_balancing = args.skip_prog_balancing
     erargs.skip_output = args.skip_output
+    erargs.profile_report = getattr(args, "profile_report", None)
+    erargs.profile_rules = getattr(args, "profile_rules", False)
 
     settings_cache: Dict[str, Tuple[argparse.Namespace, ...]] = \
         {fname: (tuple(roll_settings(yaml, args.plando) for yaml in yamls) if args.sameoptions else None)
@@ -239,6 +276,73 @@ def main(args=None, callback=ERmain):
     return callback(erargs, seed)
 
 
+_batch_state: Optional[Tuple[Any, ...]] = None
+"""(args, options, player files, callback) of generate_batch, inherited by its forked workers"""
+
+
+def _init_batch_worker(*state: Any) -> None:
+    global _batch_state
+    _batch_state = state
+
+
+def _generate_batch_seed(seed: int) -> Tuple[int, float, Optional[str]]:
+    """Generates seed in a worker of generate_batch, returning the seed, seconds taken and the error if it failed."""
+    import traceback
+
+    args, options, files, callback = _batch_state
+    Utils.init_logging(f"Generate_{seed}", loglevel=args.log_level)
+    start = time.perf_counter()
+    try:
+        roll_and_generate(args, options, seed, files, callback)
+    except Exception as e:
+        logging.exception(e)
+        return seed, time.perf_counter() - start, "".join(traceback.format_exception_only(type(e), e)).strip()
+    return seed, time.perf_counter() - start, None
+
+
+def generate_batch(args, options, seed: int, files: PlayerFiles, callback=ERmain) -> Dict[str, Any]:
+    """Generates args.count seeds counting up from seed, args.jobs at a time, reusing the loaded worlds and parsed
+    player files. Every seed gets a freshly forked process, so neither rolled options nor world state carry over.
+    Writes a summary of the results to the output path and returns it."""
+    import json
+    import multiprocessing
+
+    seeds = range(seed, seed + args.count)
+    logging.info(f"Generating {args.count} seeds from {seed} with {args.jobs} job{'s' if args.jobs > 1 else ''}.")
+    start = time.perf_counter()
+    results: List[Tuple[int, float, Optional[str]]] = []
+    if "fork" in multiprocessing.get_all_start_methods():
+        with multiprocessing.get_context("fork").Pool(args.jobs, _init_batch_worker, (args, options, files, callback),
+                                                      maxtasksperchild=1) as pool:
+            for result in pool.imap_unordered(_generate_batch_seed, seeds):
+                results.append(result)
+                logging.info(f"Seed {result[0]} {'failed' if result[2] else 'done'} after {result[1]:.2f} seconds, "
+                             f"{len(results)}/{args.count} done.")
+    else:
+        # without fork, every seed runs in this process on its own copy of the player files
+        for batch_seed in seeds:
+            _init_batch_worker(args, options, copy.deepcopy(files), callback)
+            results.append(_generate_batch_seed(batch_seed))
+    results.sort()
+
+    failures = sum(error is not None for _, _, error in results)
+    summary = {
+        "count": args.count,
+        "jobs": args.jobs,
+        "failures": failures,
+        "failure_rate": failures / args.count,
+        "total_time": time.perf_counter() - start,
+        "seeds": [{"seed": batch_seed, "seed_name": get_seed_name(random.Random(batch_seed)), "time": taken,
+                   "error": error} for batch_seed, taken, error in results],
+    }
+    output_path = args.outputpath if args.outputpath else "."
+    os.makedirs(output_path, exist_ok=True)
+    with open(os.path.join(output_path, f"generate_batch_{seed}.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=1)
+    logging.info(f"Generated {args.count - failures} of {args.count} seeds in {summary['total_time']:.2f} seconds.")
+    return summary
+
+
 def read_weights_yamls(path) -> Tuple[Any, ...]:
     try:
         if urllib.parse.urlparse(path).scheme in ('https', 'file'):
@@ -249,7 +353,7 @@ def read_weights_yamls(path) -> Tuple[Any, ...]:
     except Exception as e:
         raise Exception(f"Failed to read weights ({path})") from e
 
-    return tuple(parse_yamls(yaml))
+    return parse_yamls_cached(yaml)
 
 
 def interpret_on_off(value) -> bool:
@@ -539,7 +643,7 @@ if __name__ == '__main__':
     import atexit
     confirmation = atexit.register(input, "Press enter to close.")
     multiworld = main()
-    if __debug__:
+    if __debug__ and multiworld is not None:
         import gc
         import sys
         import weakref
@@ -1,25 +1,51 @@
 import collections
 import concurrent.futures
+import contextlib
 import logging
+import multiprocessing
 import os
-import pickle
 import tempfile
 import time
 import zipfile
-import zlib
-from typing import Dict, List, Optional, Set, Tuple, Union
+from typing import ContextManager, Dict, List, Optional, Set, Tuple, Union
 
 import worlds
 from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, Region
 from Fill import balance_multiworld_progression, distribute_items_restrictive, distribute_planned, flood_items
 from Options import StartInventoryPool
-from Utils import __version__, output_path, version_tuple
+from Utils import ProfileReport, __version__, output_path, version_tuple
 from settings import get_settings
 from worlds import AutoWorld
-from worlds.generic.Rules import exclusion_rules, locality_rules
+from worlds.generic.Rules import RuleProfile, exclusion_rules, locality_rules
 
 __all__ = ["main"]
 
+_forked_multiworld: Optional[MultiWorld] = None
+"""the multiworld of an output worker process, inherited when it was forked"""
+
+
+def _init_forked_output(multiworld: MultiWorld) -> None:
+    global _forked_multiworld
+    _forked_multiworld = multiworld
+
+
+def _generate_forked_output(player: int, output_directory: str) -> None:
+    AutoWorld.call_single(_forked_multiworld, "generate_output", player, output_directory)
+
+
+def _get_forked_players(multiworld: MultiWorld, output_players: List[int]) -> List[int]:
+    """Returns the output_players whose generate_output can run in a forked worker process, if forking is possible."""
+    if "fork" not in multiprocessing.get_all_start_methods() or multiprocessing.current_process().daemon:
+        # daemonic processes, like the WebHost's generators, are not allowed to have children
+        return []
+    return [player for player in output_players if multiworld.worlds[player].forked_output]
+
+
+def _profile(multiworld: MultiWorld, stage: str) -> ContextManager[None]:
+    if multiworld.profile_report:
+        return multiworld.profile_report.measure(stage)
+    return contextlib.nullcontext()
+
 
 def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = None):
     if not baked_server_options:
@@ -35,6 +61,8 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
 
     logger = logging.getLogger()
     multiworld.set_seed(seed, args.race, str(args.outputname) if args.outputname else None)
+    if args.profile_report:
+        multiworld.profile_report = ProfileReport()
     multiworld.plando_options = args.plando_options
 
     multiworld.shuffle = args.shuffle.copy()
@@ -286,23 +314,33 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
 
     logger.info("Running Item Plando.")
 
-    distribute_planned(multiworld)
+    with _profile(multiworld, "distribute_planned"):
+        distribute_planned(multiworld)
 
     logger.info('Running Pre Main Fill.')
 
     AutoWorld.call_all(multiworld, "pre_fill")
 
+    # after pre_fill, as worlds may still set or replace rules there
+    rule_profile: Optional[RuleProfile] = None
+    if args.profile_rules:
+        rule_profile = RuleProfile()
+        rule_profile.instrument(multiworld)
+
     logger.info(f'Filling the multiworld with {len(multiworld.itempool)} items.')
 
     if multiworld.algorithm == 'flood':
-        flood_items(multiworld)  # different algo, biased towards early game progress items
+        with _profile(multiworld, "flood_items"):
+            flood_items(multiworld)  # different algo, biased towards early game progress items
     elif multiworld.algorithm == 'balanced':
-        distribute_items_restrictive(multiworld)
+        with _profile(multiworld, "distribute_items_restrictive"):
+            distribute_items_restrictive(multiworld)
 
     AutoWorld.call_all(multiworld, 'post_fill')
 
     if multiworld.players > 1 and not args.skip_prog_balancing:
-        balance_multiworld_progression(multiworld)
+        with _profile(multiworld, "balance_multiworld_progression"):
+            balance_multiworld_progression(multiworld)
     else:
         logger.info("Progression balancing skipped.")
 
@@ -311,6 +349,10 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
 
     if args.skip_output:
         logger.info('Done. Skipped output/spoiler generation. Total Time: %s', time.perf_counter() - start)
+        if multiworld.profile_report:
+            multiworld.profile_report.write(args.profile_report)
+        if rule_profile:
+            rule_profile.log_top(multiworld)
         return multiworld
 
     logger.info(f'Beginning output...')
@@ -320,11 +362,23 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     with output as temp_dir:
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
                           is not multiworld.worlds[player].generate_output.__code__]
-        with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
+        forked_players = _get_forked_players(multiworld, output_players)
+        # CPU-bound output like ROM patching gains little from threads, so it's forked into processes if possible
+        process_pool = concurrent.futures.ProcessPoolExecutor(
+            min(len(forked_players), os.cpu_count() or 1), multiprocessing.get_context("fork"),
+            initializer=_init_forked_output, initargs=(multiworld,)
+        ) if forked_players else contextlib.nullcontext()
+        with _profile(multiworld, "output"), process_pool, \
+                concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
+            # submitted first, so the workers are forked before this process starts any threads
+            output_file_futures = [process_pool.submit(_generate_forked_output, player, temp_dir)
+                                   for player in forked_players]
             check_accessibility_task = pool.submit(multiworld.fulfills_accessibility)
 
-            output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir)]
+            output_file_futures.append(pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir))
             for player in output_players:
+                if player in forked_players:
+                    continue
                 # skip starting a thread for methods that say "pass".
                 output_file_futures.append(
                     pool.submit(AutoWorld.call_single, multiworld, "generate_output", player, temp_dir))
@@ -415,11 +469,8 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                 }
                 AutoWorld.call_all(multiworld, "modify_multidata", multidata)
 
-                multidata = zlib.compress(pickle.dumps(multidata), 9)
-
                 with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
-                    f.write(multidata)
+                    f.write(NetUtils.compress_multidata(multidata))
 
             output_file_futures.append(pool.submit(write_multidata))
             if not check_accessibility_task.result():
@@ -436,10 +487,12 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
 
         if args.spoiler > 1:
             logger.info('Calculating playthrough.')
-            multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
+            with _profile(multiworld, "create_playthrough"):
+                multiworld.spoiler.create_playthrough(create_paths=args.spoiler > 2)
 
         if args.spoiler:
-            multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
+            with _profile(multiworld, "spoiler"):
+                multiworld.spoiler.to_file(os.path.join(temp_dir, '%s_Spoiler.txt' % outfilebase))
 
         zipfilename = output_path(f"AP_{multiworld.seed_name}.zip")
         logger.info(f"Creating final archive at {zipfilename}")
@@ -449,4 +502,8 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                 zf.write(file.path, arcname=file.name)
 
     logger.info('Done. Enjoy. Total Time: %s', time.perf_counter() - start)
+    if multiworld.profile_report:
+        multiworld.profile_report.write(args.profile_report)
+    if rule_profile:
+        rule_profile.log_top(multiworld)
     return multiworld
@@ -381,13 +381,10 @@ class Context:
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
-        format_version = data[0]
-        if format_version > 3:
-            raise Utils.VersionException("Incompatible multidata.")
-        return restricted_loads(zlib.decompress(data[1:]))
+    def decompress(data: bytes) -> typing.MutableMapping[str, typing.Any]:
+        return NetUtils.decompress_multidata(data)
 
-    def _load(self, decoded_obj: dict, game_data_packages: typing.Dict[str, typing.Any],
+    def _load(self, decoded_obj: typing.MutableMapping[str, typing.Any], game_data_packages: typing.Dict[str, typing.Any],
               use_embedded_server_options: bool):
 
         self.read_data = {}
@@ -423,10 +420,11 @@ class Context:
         self.seed_name = decoded_obj["seed_name"]
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
-        self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        self.locations = LocationStore(dict(decoded_obj.pop("locations")))  # pre-emptively free memory
         self.slot_data = decoded_obj['slot_data']
-        for slot, data in self.slot_data.items():
-            self.read_data[f"slot_data_{slot}"] = lambda data=data: data
+        # iterate keys only, so slot_data of format 4 multidata is only unpacked once a slot connects or it is read
+        for slot in self.slot_data:
+            self.read_data[f"slot_data_{slot}"] = lambda local_player=slot: self.slot_data[local_player]
         self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
                              for player, loc_data in decoded_obj["er_hint_data"].items()}
 
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import typing
 import enum
+import pickle
 import warnings
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from json import JSONEncoder, JSONDecoder
 
 import websockets
 
-from Utils import ByValue, Version
+from Utils import ByValue, Version, VersionException, restricted_loads
 
 
 class JSONMessagePart(typing.TypedDict, total=False):
@@ -426,3 +429,113 @@ else:
             warnings.warn("_speedups not available. Falling back to pure python LocationStore. "
                           "Install a matching C++ compiler for your platform to compile _speedups.")
             LocationStore = _LocationStore
+
+
+multidata_format_version = 4
+"""version of the .archipelago container written by compress_multidata"""
+
+split_multidata_sections: typing.FrozenSet[str] = frozenset({
+    "slot_data", "locations", "precollected_items", "precollected_hints", "er_hint_data", "checks_in_area",
+    "datapackage"
+})
+"""multidata keys whose values are split into one section per slot or game, so these can be loaded on their own"""
+
+
+class _Section(typing.NamedTuple):
+    offset: int
+    length: int
+
+
+class LazySections(typing.MutableMapping[typing.Any, typing.Any]):
+    """
+    Mapping over the independently compressed sections of a format 4 multidata, which are only inflated and
+    unpickled the first time they are looked up. Values can be replaced or deleted like in a dict.
+    """
+    _data: memoryview
+    _entries: typing.Dict[typing.Any, typing.Any]
+
+    def __init__(self, data: memoryview, entries: typing.Dict[typing.Any, typing.Any]) -> None:
+        self._data = data
+        self._entries = entries
+
+    def __getitem__(self, key: typing.Any) -> typing.Any:
+        value = self._entries[key]
+        if type(value) is _Section:
+            value = self._entries[key] = restricted_loads(
+                zlib.decompress(self._data[value.offset:value.offset + value.length]))
+        return value
+
+    def __setitem__(self, key: typing.Any, value: typing.Any) -> None:
+        self._entries[key] = value
+
+    def __delitem__(self, key: typing.Any) -> None:
+        del self._entries[key]
+
+    def __iter__(self) -> typing.Iterator[typing.Any]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_compressed(self, key: typing.Any) -> typing.Optional[memoryview]:
+        """Returns the compressed section of key, if it wasn't loaded or replaced yet."""
+        value = self._entries[key]
+        if type(value) is _Section:
+            return self._data[value.offset:value.offset + value.length]
+        return None
+
+
+def _compress_section(container: typing.Mapping[typing.Any, typing.Any], key: typing.Any) -> bytes:
+    if isinstance(container, LazySections):
+        compressed = container.get_compressed(key)
+        if compressed is not None:
+            return bytes(compressed)
+    return zlib.compress(pickle.dumps(container[key]), 9)
+
+
+def compress_multidata(multidata: typing.Mapping[str, typing.Any]) -> bytes:
+    """
+    Returns multidata as format 4 .archipelago data: the format byte, the length of the offset table as 4 byte
+    little-endian int, the compressed offset table and then every section compressed on its own.
+    Sections of a multidata read by decompress_multidata that were never loaded are copied without recompressing.
+    """
+    jobs: typing.List[typing.Tuple[typing.Mapping[typing.Any, typing.Any], typing.Any]] = []
+    for key in multidata:
+        if key in split_multidata_sections:
+            jobs.extend((multidata[key], sub_key) for sub_key in multidata[key])
+        else:
+            jobs.append((multidata, key))
+    with ThreadPoolExecutor() as pool:  # zlib releases the GIL while compressing
+        sections = list(pool.map(_compress_section, *zip(*jobs))) if jobs else []
+
+    offset = 0
+    table: typing.Dict[str, typing.Any] = {}
+    section_iter = iter(sections)
+    for key in multidata:
+        sub_keys = multidata[key] if key in split_multidata_sections else (None,)
+        entries = {}
+        for sub_key in sub_keys:
+            length = len(next(section_iter))
+            entries[sub_key] = (offset, length)
+            offset += length
+        table[key] = entries if key in split_multidata_sections else entries[None]
+    compressed_table = zlib.compress(pickle.dumps(table), 9)
+    return b"".join((bytes([multidata_format_version]), len(compressed_table).to_bytes(4, "little"),
+                     compressed_table, *sections))
+
+
+def decompress_multidata(data: bytes) -> typing.MutableMapping[str, typing.Any]:
+    """Reads .archipelago data of format 3 or 4. Sections of format 4 are only loaded when they are looked up."""
+    format_version = data[0]
+    if format_version > multidata_format_version:
+        raise VersionException("Incompatible multidata.")
+    if format_version < 4:
+        return restricted_loads(zlib.decompress(data[1:]))
+    table_length = int.from_bytes(data[1:5], "little")
+    table: typing.Dict[str, typing.Any] = restricted_loads(zlib.decompress(data[5:5 + table_length]))
+    sections = memoryview(data)[5 + table_length:]
+    return LazySections(sections, {
+        key: LazySections(sections, {sub_key: _Section(*entry) for sub_key, entry in entry.items()})
+        if isinstance(entry, dict) else _Section(*entry)
+        for key, entry in table.items()
+    })
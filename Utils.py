@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
 import json
 import typing
 import builtins
@@ -14,6 +15,7 @@ import io
 import collections
 import importlib
 import logging
+import time
 import warnings
 
 from argparse import Namespace
@@ -236,6 +238,54 @@ parse_yaml = functools.partial(load, Loader=UniqueKeyLoader)
 parse_yamls = functools.partial(load_all, Loader=UniqueKeyLoader)
 unsafe_parse_yaml = functools.partial(load, Loader=UnsafeLoader)
 
+
+yaml_cache_size = 1000
+"""number of parsed yamls parse_yamls_cached keeps, the least recently used ones are dropped beyond that"""
+
+
+def parse_yamls_cached(text: Union[str, bytes]) -> typing.Tuple[typing.Any, ...]:
+    """Returns all documents of text like parse_yamls. The result is kept in the user's cache directory, keyed by the
+    hash of text, so unchanged yamls skip parsing the next time."""
+    import hashlib
+    import marshal
+    import tempfile
+    import yaml
+
+    key = hashlib.sha256(f"{__version__}|{yaml.__version__}|{sys.version_info[:2]}|".encode())
+    key.update(text.encode() if isinstance(text, str) else text)
+    directory = cache_path("yaml")
+    path = os.path.join(directory, f"{key.hexdigest()}.marshal")
+    try:
+        with open(path, "rb") as f:
+            documents = marshal.load(f)
+        os.utime(path)  # mark as recently used
+        return documents
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logging.debug(f"Could not load parsed yaml: {e}")
+
+    documents = tuple(parse_yamls(text))
+    try:
+        data = marshal.dumps(documents)
+        os.makedirs(directory, exist_ok=True)
+        # write to a file of our own first, so concurrent generators never read a partial file
+        with tempfile.NamedTemporaryFile("wb", dir=directory, suffix=".tmp", delete=False) as f:
+            f.write(data)
+        os.replace(f.name, path)
+    except Exception as e:  # documents with types marshal can't store, such as dates, just don't get cached
+        logging.debug(f"Could not store parsed yaml: {e}")
+    else:
+        try:
+            entries = [entry for entry in os.scandir(directory) if entry.name.endswith(".marshal")]
+            if len(entries) > yaml_cache_size:
+                entries.sort(key=lambda entry: entry.stat().st_mtime)
+                for entry in entries[:len(entries) - yaml_cache_size]:
+                    os.remove(entry.path)
+        except OSError as e:  # another process may have dropped the same entries
+            logging.debug(f"Could not prune parsed yamls: {e}")
+    return documents
+
 del load, load_all  # should not be used. don't leak their names
 
 
@@ -460,6 +510,109 @@ class KeyedDefaultDict(collections.defaultdict):
         return value
 
 
+class CopyOnWriteDict(dict):
+    """
+    Mapping of mutable containers, whose containers may be shared with forks of it.
+    Looking up a key claims it: a shared container gets replaced by a private copy before it is returned.
+    `view` maps every key to its current container and can be used for reads that should not claim.
+    """
+    __slots__ = ("view", "clone")
+    view: typing.Dict[typing.Any, typing.Any]
+    clone: typing.Callable[[typing.Any], typing.Any]
+
+    def __init__(self, clone: typing.Callable[[typing.Any], typing.Any],
+                 view: typing.Optional[typing.Dict[typing.Any, typing.Any]] = None, owned: bool = True) -> None:
+        super().__init__()
+        self.clone = clone
+        self.view = {} if view is None else view
+        if owned:
+            dict.update(self, self.view)
+
+    def __missing__(self, key):
+        value = self.clone(self.view[key])
+        self.view[key] = value
+        dict.__setitem__(self, key, value)
+        return value
+
+    def __setitem__(self, key, value) -> None:
+        self.view[key] = value
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key) -> None:
+        del self.view[key]
+        dict.pop(self, key, None)
+
+    def fork(self) -> CopyOnWriteDict:
+        """Returns a copy sharing all containers with this one, after which neither owns any of them."""
+        dict.clear(self)
+        return self.__class__(self.clone, self.view.copy(), False)
+
+    def claim_all(self) -> None:
+        for key in self.view:
+            if not dict.__contains__(self, key):
+                self.__missing__(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self.view else default
+
+    def setdefault(self, key, default=None):
+        if key not in self.view:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *default):
+        dict.pop(self, key, None)
+        return self.view.pop(key, *default)
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self.view.clear()
+
+    def update(self, *args, **kwargs) -> None:
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def copy(self) -> typing.Dict[typing.Any, typing.Any]:
+        self.claim_all()
+        return dict(self.view)
+
+    def values(self):
+        self.claim_all()
+        return self.view.values()
+
+    def items(self):
+        self.claim_all()
+        return self.view.items()
+
+    def keys(self):
+        return self.view.keys()
+
+    def __iter__(self):
+        return iter(self.view)
+
+    def __len__(self) -> int:
+        return len(self.view)
+
+    def __contains__(self, key) -> bool:
+        return key in self.view
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CopyOnWriteDict):
+            return self.view == other.view
+        return self.view == other
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.view!r})"
+
+    def __reduce__(self):
+        return self.__class__, (self.clone, self.view)
+
+
 def get_text_between(text: str, start: str, end: str) -> str:
     return text[text.index(start) + len(start): text.rindex(end)]
 
@@ -977,3 +1130,56 @@ def is_iterable_except_str(obj: object) -> TypeGuard[typing.Iterable[typing.Any]
     if isinstance(obj, str):
         return False
     return isinstance(obj, typing.Iterable)
+
+
+def get_peak_memory() -> typing.Optional[int]:
+    """Returns the peak resident memory of this process in bytes so far, if the platform reports it."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class ProfileReport:
+    """
+    Records wall time, CPU time and peak memory growth of generation stages, to be written as a JSON or CSV report.
+    CPU time is that of the whole process, so it includes threads working alongside a stage.
+    Peak memory growth is how far a stage raised the peak resident memory of the process, None where unavailable.
+    """
+    fields: typing.ClassVar[typing.Tuple[str, ...]] = \
+        ("stage", "player", "player_name", "game", "start", "wall_time", "cpu_time", "peak_memory_growth")
+
+    entries: typing.List[typing.Dict[str, typing.Any]]
+
+    def __init__(self) -> None:
+        self.entries = []
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def measure(self, stage: str, player: typing.Optional[int] = None, player_name: typing.Optional[str] = None,
+                game: typing.Optional[str] = None) -> typing.Generator[None, None, None]:
+        peak_memory = get_peak_memory()
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            wall_time = time.perf_counter() - start
+            cpu_time = time.process_time() - cpu_start
+            self.entries.append({"stage": stage, "player": player, "player_name": player_name, "game": game,
+                                 "start": start - self._start, "wall_time": wall_time, "cpu_time": cpu_time,
+                                 "peak_memory_growth": None if peak_memory is None else get_peak_memory() - peak_memory})
+
+    def write(self, path: str) -> None:
+        """Writes the entries ordered by start, as CSV if path ends with .csv and as JSON otherwise."""
+        entries = sorted(self.entries, key=lambda entry: entry["start"])
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".csv"):
+                import csv
+                writer = csv.DictWriter(f, self.fields)
+                writer.writeheader()
+                writer.writerows(entries)
+            else:
+                json.dump(entries, f, indent=1)
@@ -1,7 +1,7 @@
 import datetime
 import collections
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from typing import Any, Callable, Dict, List, MutableMapping, Optional, Set, Tuple
 from uuid import UUID
 
 from flask import render_template
@@ -46,9 +46,10 @@ class TrackerData:
 
     Provides helper methods to lazily load necessary data that each tracker require and caches any results so any
     subsequent helper method calls do not need to recompute results during the lifetime of this instance.
+    Multidata of format 4 only gets the sections inflated that the tracker looks up, like one player's locations.
     """
     room: Room
-    _multidata: Dict[str, Any]
+    _multidata: MutableMapping[str, Any]
     _multisave: Dict[str, Any]
     _tracker_cache: Dict[str, Any]
 
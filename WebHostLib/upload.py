@@ -4,7 +4,6 @@ import pickle
 import typing
 import uuid
 import zipfile
-import zlib
 
 from io import BytesIO
 from flask import request, flash, redirect, url_for, session, render_template, abort
@@ -14,7 +13,7 @@ from pony.orm.core import TransactionIntegrityError
 import schema
 
 import MultiServer
-from NetUtils import SlotType
+from NetUtils import SlotType, compress_multidata
 from Utils import VersionException, __version__
 from worlds import GamesPackage
 from worlds.Files import AutoPatchRegister
@@ -91,7 +90,7 @@ def process_multidata(compressed_multidata, files={}):
                            game=slot_info.game))
         flush()  # commit slots
 
-    compressed_multidata = compressed_multidata[0:1] + zlib.compress(pickle.dumps(decompressed_multidata), 9)
+    compressed_multidata = compress_multidata(decompressed_multidata)
     return slots, compressed_multidata
 
 
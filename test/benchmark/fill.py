@@ -0,0 +1,98 @@
+import typing
+
+fill_configs: typing.Dict[str, typing.Dict[str, int]] = {
+    "small": {"players": 1, "regions": 30},
+    "wide": {"players": 10, "regions": 100, "branching": 4},
+    "deep": {"players": 10, "regions": 100, "branching": 1, "lock_depth": 20, "keys_per_lock": 1},
+    "complex_rules": {"players": 10, "regions": 100, "lock_depth": 6, "rule_terms": 4},
+    "many_players": {"players": 50, "regions": 60},
+}
+"""keyword arguments of test.general.setup_synthetic_multiworld to run every fill function on"""
+
+
+def run_fill_benchmark():
+    import argparse
+    import gc
+    import logging
+
+    from time_it import TimeIt
+
+    from BaseClasses import MultiWorld
+    from Utils import init_logging
+    from test.general import setup_synthetic_multiworld
+    # only after the worlds got loaded through test.general, as some of them import from Fill
+    from Fill import balance_multiworld_progression, distribute_early_items, distribute_items_restrictive, \
+        fill_restrictive, remaining_fill
+
+    parser = argparse.ArgumentParser(description="Times the fill functions in isolation on synthetic worlds.")
+    parser.add_argument("configs", nargs="*", default=list(fill_configs),
+                        help=f"synthetic world configs to run, out of {', '.join(fill_configs)}. Defaults to all.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    Placements = typing.Dict[typing.Tuple[int, str], typing.Tuple[int, str]]
+
+    class BenchmarkRunner:
+        def __init__(self, config: typing.Dict[str, int]) -> None:
+            self.config = config
+
+        def setup(self) -> MultiWorld:
+            multiworld = setup_synthetic_multiworld(**self.config, seed=args.seed)
+            self.locations = sorted(multiworld.get_unfilled_locations())
+            multiworld.random.shuffle(self.locations)
+            self.itempool = sorted(multiworld.itempool)
+            multiworld.random.shuffle(self.itempool)
+            self.prog_items = [item for item in self.itempool if item.advancement]
+            self.filler_items = [item for item in self.itempool if not item.advancement]
+            return multiworld
+
+        def setup_early_items(self, multiworld: MultiWorld) -> None:
+            for player in multiworld.player_ids:
+                multiworld.early_items[player] = {"Key 0-0": 1}
+
+        def fill_progression(self, multiworld: MultiWorld) -> None:
+            fill_restrictive(multiworld, multiworld.state, self.locations, self.prog_items, lock=True)
+
+        def benchmarks(self) -> typing.Dict[str, typing.Tuple[typing.Callable[[MultiWorld], None], ...]]:
+            """name: (set up steps..., timed step)"""
+            return {
+                "fill_restrictive": (self.fill_progression,),
+                "remaining_fill": (self.fill_progression, lambda multiworld:
+                                   remaining_fill(multiworld, self.locations, self.filler_items)),
+                "distribute_early_items": (self.setup_early_items, lambda multiworld:
+                                           distribute_early_items(multiworld, self.locations, self.itempool)),
+                "distribute_items_restrictive": (distribute_items_restrictive,),
+                "balance_multiworld_progression": (distribute_items_restrictive, balance_multiworld_progression),
+            }
+
+        def run(self, name: str, steps: typing.Tuple[typing.Callable[[MultiWorld], None], ...]) \
+                -> typing.Tuple[float, Placements]:
+            multiworld = self.setup()
+            *setup_steps, timed_step = steps
+            for step in setup_steps:
+                step(multiworld)
+            gc.collect()
+            with TimeIt(f"{name}", logger) as t:
+                timed_step(multiworld)
+            return t.dif, {(location.player, location.name): (location.item.player, location.item.name)
+                           for location in multiworld.get_filled_locations()}
+
+        def main(self) -> None:
+            for name, steps in self.benchmarks().items():
+                placements = self.run(name, steps)[1]
+                # a second run from the same seed has to place everything the same way
+                if self.run(name, steps)[1] != placements:
+                    logger.error(f"{name} is not deterministic.")
+
+    for config_name in args.configs:
+        logger.info(f"Config {config_name}: {fill_configs[config_name]}")
+        BenchmarkRunner(fill_configs[config_name]).main()
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_fill_benchmark()
@@ -0,0 +1,102 @@
+import typing
+
+benchmark_games: typing.Tuple[str, ...] = (
+    "Timespinner", "Hollow Knight", "The Witness", "Subnautica", "Risk of Rain 2", "Rogue Legacy", "Slay the Spire",
+    "Stardew Valley",
+)
+"""games of the mixed player mixes, cycled through in this order. The single game mixes only use the first."""
+
+player_mixes: typing.Dict[str, typing.Tuple[str, ...]] = {
+    **{f"single_{players}": benchmark_games[:1] * players for players in (1, 10, 50, 250)},
+    **{f"mixed_{players}": tuple(benchmark_games[player % len(benchmark_games)] for player in range(players))
+       for players in (10, 50, 250)},
+}
+
+
+def run_generation(argv: typing.List[str]) -> typing.Tuple[float, typing.Optional[int]]:
+    """Runs Generate.py with argv in this process, returning the seconds taken and the peak resident memory."""
+    import sys
+    import time
+
+    import settings
+    settings.no_gui = True
+    settings.skip_autosave = True
+    import ModuleUpdate
+    ModuleUpdate.update_ran = True  # don't upgrade
+    import Generate
+    from Utils import get_peak_memory
+
+    sys.argv = [sys.argv[0], *argv]
+    start = time.perf_counter()
+    Generate.main()
+    return time.perf_counter() - start, get_peak_memory()
+
+
+def run_generation_benchmark():
+    import argparse
+    import collections
+    import concurrent.futures
+    import json
+    import logging
+    import multiprocessing
+    import os
+    import platform
+    import subprocess
+    import tempfile
+
+    from Utils import __version__, dump, init_logging
+
+    parser = argparse.ArgumentParser(description="Generates fixed seed multiworlds from canned player mixes, "
+                                                 "recording time per phase, peak memory and output size.")
+    parser.add_argument("mixes", nargs="*", default=[mix for mix in player_mixes if not mix.endswith("_250")],
+                        help=f"player mixes to run, out of {', '.join(player_mixes)}. Defaults to all up to 50 players.")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="generation_benchmark.json", help="path to write the results to as JSON")
+    args = parser.parse_args()
+
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    results = {"version": __version__, "commit": commit, "python": platform.python_version(), "seed": args.seed,
+               "mixes": {}}
+
+    for mix in args.mixes:
+        games = player_mixes[mix]
+        with tempfile.TemporaryDirectory() as player_files, tempfile.TemporaryDirectory() as output:
+            for player, game in enumerate(games, 1):
+                with open(os.path.join(player_files, f"Player{player}.yaml"), "w", encoding="utf-8") as f:
+                    f.write(dump({"name": f"Player{player}", "game": game, game: {}}))
+            report_path = os.path.join(output, "profile_report.json")
+            argv = ["--seed", str(args.seed), "--player_files_path", player_files, "--outputpath", output,
+                    "--log_level", "warning", "--profile_report", report_path]
+            # a fresh process per mix, so peak memory and caches don't carry over
+            with concurrent.futures.ProcessPoolExecutor(1, multiprocessing.get_context("spawn")) as pool:
+                total_time, peak_memory = pool.submit(run_generation, argv).result()
+
+            with open(report_path, encoding="utf-8") as f:
+                phases: typing.Dict[str, float] = collections.defaultdict(float)
+                for entry in json.load(f):
+                    phases[entry["stage"]] += entry["wall_time"]
+            os.remove(report_path)
+            output_size = sum(entry.stat().st_size for entry in os.scandir(output))
+
+        results["mixes"][mix] = {"players": len(games), "total_time": total_time, "peak_memory": peak_memory,
+                                 "output_size": output_size, "phases": phases}
+        logger.info(f"{mix} took {total_time:.4f} seconds, peaked at {peak_memory} bytes and output {output_size} "
+                    f"bytes. Slowest phases:\n" + "\n".join(
+                        f"  {taken:.4f} in {stage}"
+                        for stage, taken in sorted(phases.items(), key=lambda phase: phase[1], reverse=True)[:5]))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=1)
+    logger.info(f"Wrote results to {os.path.abspath(args.output)}")
+
+
+if __name__ == "__main__":
+    from path_change import change_home
+    change_home()
+    run_generation_benchmark()
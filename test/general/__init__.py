@@ -49,3 +49,61 @@ def setup_multiworld(worlds: Union[List[Type[World]], Type[World]], steps: Tuple
     for step in steps:
         call_all(multiworld, step)
     return multiworld
+
+
+def setup_synthetic_multiworld(players: int = 1, regions: int = 30, branching: int = 2, lock_depth: int = 4,
+                               keys_per_lock: int = 2, rule_terms: int = 0, locations_per_region: int = 4,
+                               seed: int = 0) -> MultiWorld:
+    """
+    Creates a multiworld of generic worlds with a generated region tree, independent of any real game, for testing
+    and benchmarking fill. Nothing is placed yet; the itempool holds keys and enough filler for every location.
+
+    :param players: number of worlds
+    :param regions: regions per world besides Menu, each connected to an earlier one
+    :param branching: how many regions branch off each region
+    :param lock_depth: number of tiers of keys. Entering a region at depth d of the tree takes all keys of tier
+    min(d - 1, lock_depth), so the regions right off Menu are open
+    :param keys_per_lock: progression items per tier
+    :param rule_terms: extra keys of lower tiers, picked at random, that each entrance additionally requires
+    :param locations_per_region: locations in every region, including Menu
+    :param seed: seeds the multiworld and the picks of rule_terms
+    """
+    from worlds.generic.Rules import set_rule
+    from BaseClasses import Entrance, Item, ItemClassification, Location, Region
+    from .test_fill import generate_multiworld
+
+    multiworld = generate_multiworld(players, seed)
+    for player in multiworld.player_ids:
+        keys = [[f"Key {tier}-{index}" for index in range(keys_per_lock)] for tier in range(lock_depth)]
+        all_keys = [key for tier_keys in keys for key in tier_keys]
+        player_regions = [multiworld.get_region("Menu", player)]
+        depths = [0]
+        for index in range(1, regions + 1):
+            parent_index = (index - 1) // branching
+            region = Region(f"Region {index}", player, multiworld)
+            depth = depths[parent_index] + 1
+            tier = min(depth - 1, lock_depth)
+            required = keys[tier - 1] if tier else []
+            lower_keys = [key for tier_keys in keys[:max(tier - 1, 0)] for key in tier_keys]
+            if rule_terms and lower_keys:
+                required = required + multiworld.random.sample(lower_keys, min(rule_terms, len(lower_keys)))
+            entrance = Entrance(player, f"To Region {index}", player_regions[parent_index])
+            player_regions[parent_index].exits.append(entrance)
+            entrance.connect(region)
+            if required:
+                set_rule(entrance, lambda state, required=tuple(required), player=player:
+                         state.has_all(required, player), required)
+            player_regions.append(region)
+            depths.append(depth)
+            multiworld.regions.append(region)
+        for region in player_regions:
+            region.locations += [Location(player, f"{region.name} Location {index}", None, region)
+                                 for index in range(locations_per_region)]
+        location_count = (regions + 1) * locations_per_region
+        assert location_count >= len(all_keys), "more keys than locations"
+        multiworld.itempool += [Item(key, ItemClassification.progression, None, player) for key in all_keys]
+        multiworld.itempool += [Item(f"Filler {index}", ItemClassification.filler, None, player)
+                                for index in range(location_count - len(all_keys))]
+        multiworld.completion_condition[player] = lambda state, player=player, all_keys=tuple(all_keys), \
+            goal=player_regions[-1]: state.has_all(all_keys, player) and goal.can_reach(state)
+    return multiworld
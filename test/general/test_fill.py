@@ -1,19 +1,20 @@
-from typing import List, Iterable
+from typing import List, Iterable, Optional
 import unittest
 
 import Options
 from Options import Accessibility
 from worlds.AutoWorld import World
-from Fill import FillError, balance_multiworld_progression, fill_restrictive, \
-    distribute_early_items, distribute_items_restrictive
+from Fill import AssumedState, FillError, balance_multiworld_progression, fill_restrictive, \
+    distribute_early_items, distribute_items_restrictive, remaining_fill, swap_location_item, sweep_from_pool
 from BaseClasses import Entrance, LocationProgressType, MultiWorld, Region, Item, Location, \
     ItemClassification, CollectionState
 from worlds.generic.Rules import CollectionRule, add_item_rule, locality_rules, set_rule
+from . import setup_synthetic_multiworld
 
 
-def generate_multiworld(players: int = 1) -> MultiWorld:
+def generate_multiworld(players: int = 1, seed: int = 0) -> MultiWorld:
     multiworld = MultiWorld(players)
-    multiworld.set_seed(0)
+    multiworld.set_seed(seed)
     multiworld.player_name = {}
     multiworld.state = CollectionState(multiworld)
     for i in range(players):
@@ -513,6 +514,155 @@ class TestFillRestrictive(unittest.TestCase):
         self.assertEqual(1, len(player1.prog_items))
         self.assertIsNot(loc0.item, player1.prog_items[0], "Filled item was still present in item pool")
 
+    def test_item_pool_on_place(self):
+        """Test that on_place callbacks see the item pool without the items placed so far"""
+        multiworld = generate_multiworld()
+        player1 = generate_player_data(multiworld, 1, 3, 3)
+        item_pool = player1.prog_items
+        pool_sizes = []
+
+        def on_place(location: Location) -> None:
+            self.assertFalse(any(item is location.item for item in item_pool))
+            pool_sizes.append(len(item_pool))
+
+        fill_restrictive(multiworld, multiworld.state, player1.locations, item_pool, on_place=on_place)
+
+        self.assertEqual([2, 1, 0], pool_sizes)
+
+
+class TestAssumedState(unittest.TestCase):
+    def test_matches_sweep_from_pool(self):
+        """Test that removing and re-adding items keeps the assumed state equal to one rebuilt from the pool"""
+        multiworld = generate_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 3, 3, 1)
+        player2 = generate_player_data(multiworld, 2, 3, 3)
+        player1.prog_items[1].name = player1.prog_items[0].name
+        pool = player1.prog_items + player2.prog_items + player1.basic_items
+        assumed_state = AssumedState(multiworld.state, pool)
+
+        for item in (player1.prog_items[0], player2.prog_items[2], player1.basic_items[0]):
+            pool.remove(item)
+            assumed_state.remove(item)
+            self.assertEqual(sweep_from_pool(multiworld.state, pool).prog_items, assumed_state.sweep().prog_items)
+        pool.append(player2.prog_items[2])
+        assumed_state.add(player2.prog_items[2])
+        self.assertEqual(sweep_from_pool(multiworld.state, pool).prog_items, assumed_state.sweep().prog_items)
+
+    def test_progressive_items(self):
+        """Test that items resolved by what the state already holds are removed and re-added like in a swap"""
+        class ProgressiveWorld(World):
+            item_name_to_id = {}
+            location_name_to_id = {}
+
+            def collect_item(self, state: CollectionState, item: Item, remove: bool = False) -> Optional[str]:
+                if item.name == "Progressive Sword":
+                    if remove:
+                        return "Master Sword" if state.has("Master Sword", self.player) else "Fighter Sword"
+                    return "Master Sword" if state.has("Fighter Sword", self.player) else "Fighter Sword"
+                return super().collect_item(state, item, remove)
+
+        multiworld = generate_multiworld()
+        world = ProgressiveWorld(multiworld, 1)
+        world.options = multiworld.worlds[1].options
+        multiworld.worlds[1] = world
+        swords = [Item("Progressive Sword", ItemClassification.progression, None, 1) for _ in range(2)]
+        pool = swords[:]
+        assumed_state = AssumedState(multiworld.state, pool)
+
+        # take out the item that was collected first, then put it back after a failed placement
+        pool.remove(swords[0])
+        assumed_state.remove(swords[0])
+        self.assertEqual(sweep_from_pool(multiworld.state, pool).prog_items, assumed_state.sweep().prog_items)
+        pool.insert(0, swords[0])
+        assumed_state.add(swords[0])
+        self.assertEqual(sweep_from_pool(multiworld.state, pool).prog_items, assumed_state.sweep().prog_items)
+        self.assertEqual(1, assumed_state.sweep().count("Fighter Sword", 1))
+
+
+class TestFindItem(unittest.TestCase):
+    def test_placements(self):
+        """Test that find_item_locations follows every way of changing the item of a location"""
+        multiworld = generate_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 5, 0, 2)
+        player2 = generate_player_data(multiworld, 2, 2, 0, 1)
+        item0, item1 = player1.basic_items
+        copy0 = Item(item0.name, item0.classification, None, 1)
+
+        def scan() -> List[Location]:
+            return [location for location in multiworld.get_locations()
+                    if location.item and location.item.name == item0.name and location.item.player == 1]
+
+        multiworld.push_item(player1.locations[3], item0, False)
+        player2.locations[1].place_locked_item(copy0)
+        player1.locations[1].item = copy0  # copy0 is now in two locations, as some worlds manage to do
+        self.assertEqual(scan(), multiworld.find_item_locations(item0.name, 1))
+        self.assertIs(player1.locations[1], multiworld.find_item(item0.name, 1))
+
+        multiworld.push_item(player1.locations[0], item1, False)
+        swap_location_item(player1.locations[0], player1.locations[3])
+        player2.locations[1].item = None
+        player1.menu.locations.remove(player1.locations[1])
+        self.assertEqual([player1.locations[0]], multiworld.find_item_locations(item0.name, 1))
+        self.assertEqual([player1.locations[0], player1.locations[3]],
+                         multiworld.find_items_in_locations({item0.name, item1.name}, 1))
+        self.assertEqual([], multiworld.find_item_locations(player2.basic_items[0].name, 2))
+
+
+class TestFilledLocations(unittest.TestCase):
+    def test_filled_locations(self):
+        """Test that the filled and unfilled locations keep the order of get_locations through changes"""
+        multiworld = generate_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 4, 0, 3)
+        player2 = generate_player_data(multiworld, 2, 2, 0, 1)
+        detached = Location(1, "detached")
+        player1.menu.locations.append(detached)
+
+        def assert_scan() -> None:
+            for player in (None, 1, 2):
+                self.assertEqual([location for location in multiworld.get_locations(player) if location.item],
+                                 multiworld.get_filled_locations(player))
+                self.assertEqual([location for location in multiworld.get_locations(player) if not location.item],
+                                 multiworld.get_unfilled_locations(player))
+
+        assert_scan()
+        multiworld.push_item(player1.locations[2], player1.basic_items[0], False)
+        player2.locations[0].place_locked_item(player2.basic_items[0])
+        detached.item = player1.basic_items[1]
+        assert_scan()
+        player1.locations[0].item = player1.basic_items[2]
+        swap_location_item(player1.locations[2], player1.locations[0])
+        player2.locations[0].item = None
+        player1.menu.locations.remove(player1.locations[0])
+        assert_scan()
+        player1.menu.locations.append(player1.locations[0])
+        assert_scan()
+
+
+class TestRemainingFill(unittest.TestCase):
+    def test_shared_item_rules(self):
+        """Test that locations sharing an item rule are filled in order and the rule is asked once per item kind"""
+        multiworld = generate_multiworld()
+        player1 = generate_player_data(multiworld, 1, 6, 0, 3)
+        item0, item1, item2 = player1.basic_items
+        duplicate_item = Item(item1.name, item1.classification, None, 1)
+        calls = []
+
+        def shared_rule(item: Item) -> bool:
+            calls.append(item.name)
+            return item.name == item0.name
+
+        for location in player1.locations[:3]:
+            location.item_rule = shared_rule
+        locations = player1.locations.copy()
+        remaining_fill(multiworld, locations, [item0, item1, duplicate_item, item2])
+
+        self.assertEqual(item0, player1.locations[0].item)
+        self.assertEqual(item2, player1.locations[3].item)
+        self.assertIs(duplicate_item, player1.locations[4].item)
+        self.assertIs(item1, player1.locations[5].item)
+        self.assertEqual(player1.locations[1:3], locations)
+        self.assertEqual([item2.name, item1.name, item0.name], calls)
+
 
 class TestDistributeItemsRestrictive(unittest.TestCase):
     def test_basic_distribute(self):
@@ -748,6 +898,22 @@ class TestDistributeItemsRestrictive(unittest.TestCase):
             self.assertEqual(item.player, item.location.player)
             self.assertFalse(item.location.event, False)
 
+    def test_non_local_items_rules(self):
+        """Test that locality rules only wrap the item rules of locations that have something forbidden"""
+        multiworld = generate_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, location_count=2, basic_item_count=2)
+        player2 = generate_player_data(multiworld, 2, location_count=2, basic_item_count=2)
+        unrestricted_rule = player2.locations[0].item_rule
+
+        multiworld.non_local_items[player1.id].value = {player1.basic_items[0].name}
+        locality_rules(multiworld)
+
+        self.assertIs(player1.locations[0].item_rule, player1.locations[1].item_rule)
+        self.assertFalse(player1.locations[0].item_rule(player1.basic_items[0]))
+        self.assertTrue(player1.locations[0].item_rule(player1.basic_items[1]))
+        self.assertTrue(player1.locations[0].item_rule(player2.basic_items[0]))
+        self.assertIs(unrestricted_rule, player2.locations[0].item_rule)
+
     def test_early_items(self) -> None:
         """Test that the early items API successfully places items early"""
         mw = generate_multiworld(2)
@@ -798,6 +964,18 @@ class TestDistributeItemsRestrictive(unittest.TestCase):
         for item in early_items:
             assert item in items_in_locations, "early item to be placed in location"
 
+    def test_synthetic_distribute(self):
+        """Test that distribute_items_restrictive beats a synthetic multiworld the same way from the same seed"""
+        placements = []
+        for _ in range(2):
+            multiworld = setup_synthetic_multiworld(players=3, regions=20, lock_depth=3, rule_terms=2, seed=1)
+            distribute_items_restrictive(multiworld)
+            self.assertFalse(multiworld.get_unfilled_locations())
+            self.assertTrue(multiworld.can_beat_game(CollectionState(multiworld)))
+            placements.append([(location.player, location.name, location.item.player, location.item.name)
+                               for location in multiworld.get_locations()])
+        self.assertEqual(placements[0], placements[1])
+
 
 class TestBalanceMultiworldProgression(unittest.TestCase):
     def assertRegionContains(self, region: Region, item: Item) -> bool:
@@ -1,7 +1,10 @@
 import unittest
+from unittest import mock
 
+from BaseClasses import Item, ItemClassification
 from worlds.AutoWorld import AutoWorldRegister, call_all
 from . import setup_solo_multiworld
+from .test_fill import generate_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -87,3 +90,37 @@ class TestBase(unittest.TestCase):
                         call_all(multiworld, step)
                         self.assertEqual(created_items, multiworld.itempool,
                                          f"{game_name} modified the itempool during {step}")
+
+
+class TestIsolatedStages(unittest.TestCase):
+    def test_itempool_order(self) -> None:
+        """Tests that items added by concurrently run stages are merged into the itempool in player order"""
+        multiworld = generate_multiworld(3)
+        itempool = multiworld.itempool
+        for player in (1, 3):
+            multiworld.worlds[player].isolated_stages = frozenset({"create_items"})
+
+        def create_items(player: int) -> None:
+            multiworld.itempool.append(Item(f"First {player}", ItemClassification.filler, None, player))
+            multiworld.itempool += [Item(f"Second {player}", ItemClassification.filler, None, player)]
+
+        for player in multiworld.player_ids:
+            multiworld.worlds[player].create_items = lambda player=player: create_items(player)
+        with mock.patch("worlds.AutoWorld.concurrent_stages", True):
+            call_all(multiworld, "create_items")
+        self.assertIs(itempool, multiworld.itempool)
+        self.assertEqual([f"{order} {player}" for player in multiworld.player_ids for order in ("First", "Second")],
+                         [item.name for item in multiworld.itempool])
+
+    def test_itempool_changes(self) -> None:
+        """Tests that concurrently run stages can't change items already in the itempool"""
+        multiworld = generate_multiworld(2)
+        itempool = multiworld.itempool
+        itempool.append(Item("Existing", ItemClassification.filler, None, 1))
+        for player in multiworld.player_ids:
+            multiworld.worlds[player].isolated_stages = frozenset({"create_items"})
+            multiworld.worlds[player].create_items = lambda: multiworld.itempool.remove(multiworld.itempool[0])
+        with mock.patch("worlds.AutoWorld.concurrent_stages", True), self.assertRaises(RuntimeError):
+            call_all(multiworld, "create_items")
+        self.assertIs(itempool, multiworld.itempool)
+        self.assertEqual(["Existing"], [item.name for item in multiworld.itempool])
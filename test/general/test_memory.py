@@ -14,3 +14,20 @@ class TestWorldMemory(unittest.TestCase):
                 weak = weakref.ref(setup_solo_multiworld(world_type))
                 gc.collect()
                 self.assertFalse(weak(), "World leaked a reference")
+
+
+class TestSlots(unittest.TestCase):
+    def test_undeclared_attributes(self):
+        """Tests that Regions, Entrances and Locations keep taking attributes their slots don't declare."""
+        from BaseClasses import Entrance, Location, Region
+        from .test_fill import generate_multiworld
+
+        multiworld = generate_multiworld()
+        region = Region("Region", 1, multiworld)
+        entrance = Entrance(1, "Entrance", region)
+        location = Location(1, "Location", None, region)
+        for obj in (region, entrance, location):
+            with self.subTest(type=type(obj).__name__):
+                obj.world_specific = 1
+                self.assertEqual(1, obj.world_specific)
+                self.assertEqual({"world_specific": 1}, vars(obj))
@@ -0,0 +1,325 @@
+import unittest
+from collections import Counter
+from typing import Optional
+
+from BaseClasses import CollectionState, IndexedCounter, IndexedSet, Item, Region
+from worlds.AutoWorld import World
+from worlds.generic.Rules import RuleProfile, add_rule, set_rule
+from .test_fill import generate_multiworld, generate_player_data
+
+
+class TestCollectionStateCopy(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_multiworld(2)
+        self.player1 = generate_player_data(self.multiworld, 1, 2, 2)
+        self.player2 = generate_player_data(self.multiworld, 2, 2, 2)
+
+    def test_copy_is_independent(self) -> None:
+        """Tests that writes to a copied state do not leak into the original or the other way around"""
+        state = CollectionState(self.multiworld)
+        state.collect(self.player1.prog_items[0], True)
+        state.update_reachable_regions(1)
+        copied = state.copy()
+
+        copied.collect(self.player1.prog_items[1], True)
+        copied.collect(self.player2.prog_items[0], True)
+        self.assertTrue(copied.has(self.player1.prog_items[1].name, 1))
+        self.assertTrue(copied.has(self.player2.prog_items[0].name, 2))
+        self.assertFalse(state.has(self.player1.prog_items[1].name, 1))
+        self.assertFalse(state.has(self.player2.prog_items[0].name, 2))
+
+        state.collect(self.player2.prog_items[1], True)
+        self.assertFalse(copied.has(self.player2.prog_items[1].name, 2))
+
+        copied.reachable_regions[1].clear()
+        self.assertIn(self.player1.menu, state.reachable_regions[1])
+
+    def test_copy_shares_untouched_players(self) -> None:
+        """Tests that a copy only clones the data of players it writes to"""
+        state = CollectionState(self.multiworld)
+        state.collect(self.player1.prog_items[0], True)
+        copied = state.copy()
+        self.assertIs(state.prog_items.view[2], copied.prog_items.view[2])
+
+        copied.collect(self.player1.prog_items[1], True)
+        self.assertIsNot(state.prog_items.view[1], copied.prog_items.view[1])
+        self.assertIs(state.prog_items.view[2], copied.prog_items.view[2])
+
+    def test_prog_items_assignment(self) -> None:
+        """Tests that prog_items can still be replaced by a plain dict"""
+        state = CollectionState(self.multiworld)
+        state.collect(self.player1.prog_items[0], True)
+        state.prog_items = {1: Counter(), 2: Counter()}
+        self.assertFalse(state.has(self.player1.prog_items[0].name, 1))
+        state.collect(self.player1.prog_items[0], True)
+        self.assertTrue(state.has(self.player1.prog_items[0].name, 1))
+        self.assertEqual(1, state.copy().count(self.player1.prog_items[0].name, 1))
+
+    def test_indexed_item_counts(self) -> None:
+        """Tests that worlds opting into indexed_item_counts get an IndexedCounter that copies independently"""
+        self.multiworld.worlds[1].indexed_item_counts = True
+        state = CollectionState(self.multiworld)
+        self.assertIsInstance(state.prog_items[1], IndexedCounter)
+        self.assertIsInstance(state.prog_items[2], Counter)
+        state.collect(self.player1.prog_items[0], True)
+        copied = state.copy()
+        copied.collect(self.player1.prog_items[0], True)
+        self.assertEqual(1, state.count(self.player1.prog_items[0].name, 1))
+        self.assertEqual(2, copied.count(self.player1.prog_items[0].name, 1))
+
+
+class TestSweepForEvents(unittest.TestCase):
+    def test_chained_events(self) -> None:
+        """Tests that events unlocking regions or rules of other events are all collected in one sweep"""
+        multiworld = generate_multiworld(2)
+        player1 = generate_player_data(multiworld, 1, 1, 3)
+        player2 = generate_player_data(multiworld, 2, 1, 1)
+        key1, key2, key3 = player1.prog_items
+        region = player1.generate_region(player1.menu, 1, lambda state: state.has(key1.name, 1))
+        locked_location = player1.generate_region(player1.menu, 1).locations[0]
+        locked_location.access_rule = lambda state: state.has(key2.name, 1)
+        for location, item in ((player1.locations[0], key1), (region.locations[0], key2),
+                               (locked_location, key3), (player2.locations[0], player2.prog_items[0])):
+            multiworld.push_item(location, item, False)
+            location.event = True
+
+        state = CollectionState(multiworld)
+        state.sweep_for_events()
+        self.assertTrue(state.has_all((key1.name, key2.name, key3.name), 1))
+        self.assertTrue(state.has(player2.prog_items[0].name, 2))
+        self.assertEqual(4, len(state.events))
+
+
+class TestRuleDependencies(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_multiworld()
+        self.player1 = generate_player_data(self.multiworld, 1, 1, 2)
+        self.key, self.other = self.player1.prog_items
+        self.region = self.player1.generate_region(self.player1.menu, 1)
+        self.entrance = self.region.entrances[0]
+        self.calls = 0
+
+    def counted_rule(self, state: CollectionState) -> bool:
+        self.calls += 1
+        return state.has(self.key.name, 1)
+
+    def test_declared_dependencies(self) -> None:
+        """Tests that blocked entrances are only re-evaluated after an item they declared changed"""
+        set_rule(self.entrance, self.counted_rule, [self.key.name])
+        state = CollectionState(self.multiworld)
+        self.assertFalse(self.region.can_reach(state))
+        self.assertEqual(1, self.calls)
+        state.collect(self.other, True)
+        self.assertFalse(state.copy().can_reach(self.region))
+        self.assertEqual(1, self.calls)
+        state.collect(self.key, True)
+        self.assertTrue(self.region.can_reach(state))
+        self.assertEqual(2, self.calls)
+
+    def test_entrance_dependents(self) -> None:
+        """Tests that entrances are indexed by the items their rule declared and re-indexed once a rule is set"""
+        regions = self.multiworld.regions
+        set_rule(self.entrance, self.counted_rule, [self.key.name])
+        undeclared, dependents = regions.get_entrance_dependents(1)
+        self.assertIn(self.entrance.index, dependents[self.key.name])
+        self.assertNotIn(self.other.name, dependents)
+        self.assertFalse(undeclared and undeclared[self.entrance.index])
+        self.entrance.access_rule = lambda state: self.counted_rule(state)
+        undeclared, dependents = regions.get_entrance_dependents(1)
+        self.assertNotIn(self.key.name, dependents)
+        self.assertTrue(undeclared[self.entrance.index])
+
+    def test_undeclared_dependencies(self) -> None:
+        """Tests that rules without complete declared dependencies are re-evaluated after every collect"""
+        set_rule(self.entrance, self.counted_rule, [self.key.name])
+        add_rule(self.entrance, lambda state: True)
+        state = CollectionState(self.multiworld)
+        self.assertFalse(self.region.can_reach(state))
+        state.collect(self.other, True)
+        self.assertFalse(self.region.can_reach(state))
+        self.assertEqual(2, self.calls)
+
+        set_rule(self.entrance, self.counted_rule, [self.other.name])
+        self.entrance.access_rule = lambda state: self.counted_rule(state)
+        state.collect(self.other, True)
+        self.assertFalse(self.region.can_reach(state))
+        self.assertEqual(3, self.calls)
+        state.collect(self.key, True)
+        self.assertTrue(self.region.can_reach(state))
+        self.assertEqual(4, self.calls)
+
+    def test_tracks_item_changes(self) -> None:
+        """Tests that worlds overriding how items are collected into a state don't track item changes"""
+        class Mixin:
+            pass
+
+        class TrackingWorld(World, Mixin):
+            item_name_to_id = {}
+            location_name_to_id = {}
+
+        class ProgressiveWorld(World):
+            item_name_to_id = {}
+            location_name_to_id = {}
+
+            def collect_item(self, state: CollectionState, item: Item, remove: bool = False) -> Optional[str]:
+                return super().collect_item(state, item, remove)
+
+        class ProgressiveChildWorld(Mixin, ProgressiveWorld):
+            item_name_to_id = {}
+            location_name_to_id = {}
+
+        self.assertTrue(TrackingWorld.tracks_item_changes)
+        self.assertFalse(ProgressiveWorld.tracks_item_changes)
+        self.assertFalse(ProgressiveChildWorld.tracks_item_changes)
+
+    def test_rule_profile(self) -> None:
+        """Tests that instrumented rules are counted and keep their declared dependencies"""
+        set_rule(self.entrance, self.counted_rule, [self.key.name])
+        rule_profile = RuleProfile()
+        rule_profile.instrument(self.multiworld)
+        self.assertEqual([self.entrance], list(rule_profile.stats))
+        state = CollectionState(self.multiworld)
+        self.assertFalse(self.region.can_reach(state))
+        state.collect(self.other, True)
+        self.assertFalse(self.region.can_reach(state))
+        self.assertEqual(1, self.calls)
+        self.assertEqual(1, rule_profile.stats[self.entrance][0])
+        add_rule(self.entrance, lambda state: True, items=())
+        state.collect(self.key, True)
+        self.assertTrue(self.region.can_reach(state))
+        self.assertEqual(2, rule_profile.stats[self.entrance][0])
+
+
+class TestIndexedCounter(unittest.TestCase):
+    def setUp(self) -> None:
+        indices = {"Sword": 0, "Shield": 1, "Bow": 2}
+        self.counter = IndexedCounter(indices, {"Weapons": ((0, 2), ("Event Sword",))})
+
+    def test_counter_behaviour(self) -> None:
+        """Tests that IndexedCounter behaves like the Counter it replaces"""
+        counter = self.counter
+        self.assertEqual(0, counter["Sword"])
+        self.assertEqual(0, counter["Event"])
+        counter["Sword"] += 2
+        counter["Event"] += 1
+        self.assertEqual(2, counter["Sword"])
+        self.assertEqual(1, counter["Event"])
+        self.assertEqual({"Sword": 2, "Event": 1}, dict(counter))
+        self.assertIn("Sword", counter)
+        self.assertNotIn("Shield", counter)
+        self.assertEqual(5, counter.get("Shield", 5))
+        del counter["Sword"]
+        del counter["Event"]
+        self.assertEqual(0, len(counter))
+
+    def test_copy(self) -> None:
+        """Tests that copies of an IndexedCounter are independent"""
+        self.counter["Bow"] += 1
+        copied = self.counter.copy()
+        copied["Bow"] += 1
+        copied["Event"] += 1
+        self.assertEqual(1, self.counter["Bow"])
+        self.assertEqual(0, self.counter["Event"])
+        self.assertEqual(2, copied["Bow"])
+
+    def test_count_group(self) -> None:
+        """Tests that group counts include indexed and overflow names"""
+        self.counter["Sword"] += 1
+        self.counter["Bow"] += 2
+        self.counter["Shield"] += 4
+        self.counter["Event Sword"] += 1
+        self.assertEqual(4, self.counter.count_group("Weapons"))
+
+
+class TestIndexedSet(unittest.TestCase):
+    def test_set_behaviour(self) -> None:
+        """Tests that IndexedSet behaves like the set of regions it replaces"""
+        multiworld = generate_multiworld()
+        player1 = generate_player_data(multiworld, 1, 2, 0)
+        regions = IndexedSet(multiworld.regions.indexed_regions[1], [player1.menu])
+        late_region = Region("Late", 1, multiworld)
+        self.assertIn(player1.menu, regions)
+        self.assertNotIn(late_region, regions)
+        regions.add(late_region)
+        copied = regions.copy()
+        regions.remove(player1.menu)
+        self.assertEqual({late_region}, regions)
+        self.assertEqual({player1.menu, late_region}, copied)
+        self.assertEqual(2, len(copied))
+        self.assertEqual({player1.menu}, copied.difference(regions))
+        regions.discard(late_region)
+        self.assertRaises(KeyError, regions.remove, late_region)
+        self.assertFalse(regions)
+
+    def test_reset_by_assignment(self) -> None:
+        """Tests that reachability can still be reset by assigning a plain set"""
+        multiworld = generate_multiworld()
+        player1 = generate_player_data(multiworld, 1, 2, 0)
+        region = player1.generate_region(player1.menu, 1)
+        state = CollectionState(multiworld)
+        self.assertTrue(region.can_reach(state))
+        region.entrances[0].access_rule = lambda state: False
+        state.reachable_regions[1] = set()
+        state.stale[1] = True
+        self.assertFalse(region.can_reach(state))
+        self.assertIsInstance(state.reachable_regions[1], IndexedSet)
+        self.assertEqual({player1.menu}, state.reachable_regions[1])
+
+
+class TestSphereCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_multiworld()
+        self.player1 = generate_player_data(self.multiworld, 1, 2, 3, 1)
+        self.key, self.goal, self.spare = self.player1.prog_items
+        self.calls = 0
+        self.region = self.player1.generate_region(self.player1.menu, 1, self.counted_rule)
+        self.multiworld.push_item(self.player1.locations[0], self.key, False)
+        self.multiworld.push_item(self.region.locations[0], self.goal, False)
+        self.multiworld.push_item(self.player1.locations[1], self.player1.basic_items[0], False)
+        self.multiworld.completion_condition[1] = lambda state: state.has(self.goal.name, 1)
+
+    def counted_rule(self, state: CollectionState) -> bool:
+        self.calls += 1
+        return state.has(self.key.name, 1)
+
+    def test_shared_sweep(self) -> None:
+        """Tests that sphere consumers share one sweep until an item moves"""
+        multiworld = self.multiworld
+        self.assertEqual([{self.player1.locations[0], self.player1.locations[1]}, {self.region.locations[0]}],
+                         list(multiworld.get_spheres()))
+        self.assertTrue(multiworld.can_beat_game())
+        self.assertTrue(multiworld.fulfills_accessibility())
+        calls = self.calls
+        self.assertTrue(multiworld.can_beat_game())
+        sweep = multiworld.sphere_cache.get_sweep(progression_only=True)
+        self.assertEqual(1, sweep.get_sphere_number(self.region.locations[0]))
+        self.assertEqual(calls, self.calls)
+        self.assertIs(sweep, multiworld.sphere_cache.get_sweep(progression_only=True))
+        # states are handed out as copies, so callers can't change the shared sweep
+        sweep.get_state(0).collect(self.spare, True)
+        sweep.finish().collect(self.spare, True)
+        self.assertFalse(sweep.get_state(0).has(self.spare.name, 1))
+        self.assertFalse(sweep.finish().has(self.spare.name, 1))
+        multiworld.push_precollected(self.spare)
+        precollected_sweep = multiworld.sphere_cache.get_sweep(progression_only=True)
+        self.assertIsNot(sweep, precollected_sweep)
+        # the spoiler playthrough takes precollected items out directly
+        multiworld.precollected_items[1].remove(self.spare)
+        self.assertIsNot(precollected_sweep, multiworld.sphere_cache.get_sweep(progression_only=True))
+
+        self.player1.locations[0].item = None
+        self.assertFalse(multiworld.can_beat_game())
+        self.assertFalse(multiworld.fulfills_accessibility())
+        self.assertEqual([{self.player1.locations[1]}, set(), {self.region.locations[0]}],
+                         list(multiworld.get_spheres()))
+
+    def test_playthrough(self) -> None:
+        """Tests that the playthrough only keeps required progression and leaves the placement as it was"""
+        spare_location = self.player1.generate_region(self.player1.menu, 1).locations[0]
+        self.multiworld.push_item(spare_location, self.spare, False)
+        self.multiworld.spoiler.create_playthrough(create_paths=False)
+        self.assertEqual({"1": {str(self.player1.locations[0]): str(self.key)},
+                          "2": {str(self.region.locations[0]): str(self.goal)}},
+                         {sphere: locations for sphere, locations in self.multiworld.spoiler.playthrough.items()
+                          if sphere != "0"})
+        self.assertIs(self.spare, spare_location.item)
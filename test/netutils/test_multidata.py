@@ -0,0 +1,49 @@
+# Tests for the .archipelago container of NetUtils
+import pickle
+import unittest
+import zlib
+
+from NetUtils import LazySections, NetworkSlot, SlotType, compress_multidata, decompress_multidata
+from Utils import VersionException
+
+sample_multidata = {
+    "slot_info": {1: NetworkSlot("Player1", "Game", SlotType.player), 2: NetworkSlot("Player2", "Game", SlotType.player)},
+    "slot_data": {1: {"goal": 1}, 2: {"goal": 2}},
+    "locations": {1: {11: (21, 2, 0)}, 2: {21: (11, 1, 0)}},
+    "datapackage": {"Game": {"checksum": "abc"}},
+    "server_options": {"hint_cost": 10},
+    "seed_name": "12345",
+}
+
+
+class TestMultidata(unittest.TestCase):
+    def test_roundtrip(self) -> None:
+        """Tests that format 4 reads back as the multidata that was written"""
+        data = compress_multidata(sample_multidata)
+        self.assertEqual(4, data[0])
+        multidata = decompress_multidata(data)
+        self.assertEqual(list(sample_multidata), list(multidata))
+        self.assertEqual(sample_multidata, {key: dict(value) if isinstance(value, LazySections) else value
+                                            for key, value in multidata.items()})
+
+    def test_lazy_sections(self) -> None:
+        """Tests that sections are only loaded when looked up and can be changed like a dict"""
+        multidata = decompress_multidata(compress_multidata(sample_multidata))
+        slot_data = multidata["slot_data"]
+        self.assertIsNotNone(slot_data.get_compressed(2))
+        self.assertEqual({"goal": 1}, slot_data[1])
+        self.assertIsNone(slot_data.get_compressed(1))
+        self.assertIsNotNone(slot_data.get_compressed(2))
+
+        del multidata["datapackage"]["Game"]
+        multidata["seed_name"] = "54321"
+        rewritten = decompress_multidata(compress_multidata(multidata))
+        self.assertEqual({}, dict(rewritten["datapackage"]))
+        self.assertEqual("54321", rewritten["seed_name"])
+        self.assertEqual({"goal": 2}, rewritten["slot_data"][2])
+
+    def test_format_3(self) -> None:
+        """Tests that the single blob of format 3 can still be read"""
+        data = bytes([3]) + zlib.compress(pickle.dumps(sample_multidata), 9)
+        self.assertEqual(sample_multidata, decompress_multidata(data))
+        self.assertRaises(VersionException, decompress_multidata, bytes([5]) + data[1:])
@@ -1,5 +1,6 @@
 # Tests for Generate.py (ArchipelagoGenerate.exe)
 
+import json
 import unittest
 import os
 import os.path
@@ -91,3 +92,17 @@ class TestGenerateMain(unittest.TestCase):
             user_path.cached_path = user_path_backup
 
         self.assertOutput(self.output_tempdir.name)
+
+    def test_generate_batch(self):
+        sys.argv = [sys.argv[0], '--seed', '0', '--count', '2', '--jobs', '2',
+                    '--player_files_path', str(self.abs_input_dir),
+                    '--outputpath', self.output_tempdir.name]
+        print(f'Testing Generate.py {sys.argv} in {os.getcwd()}')
+        Generate.main()
+
+        output_path = Path(self.output_tempdir.name)
+        self.assertEqual(2, len(list(output_path.glob('*.zip'))), list(output_path.glob('*')))
+        with open(output_path / 'generate_batch_0.json', encoding='utf-8') as f:
+            summary = json.load(f)
+        self.assertEqual(0, summary['failures'])
+        self.assertEqual([0, 1], [entry['seed'] for entry in summary['seeds']])
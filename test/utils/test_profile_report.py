@@ -0,0 +1,40 @@
+# Tests for ProfileReport in Utils.py
+
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from Utils import ProfileReport
+
+
+class TestProfileReport(unittest.TestCase):
+    def setUp(self) -> None:
+        self.report = ProfileReport()
+        with self.report.measure("output"):
+            with self.report.measure("generate_output", 1, "Player1", "Game"):
+                pass
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_json(self) -> None:
+        path = os.path.join(self.directory.name, "report.json")
+        self.report.write(path)
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        self.assertEqual(["output", "generate_output"], [entry["stage"] for entry in entries])
+        self.assertEqual(list(ProfileReport.fields), list(entries[1]))
+        self.assertEqual((1, "Player1", "Game"), (entries[1]["player"], entries[1]["player_name"], entries[1]["game"]))
+        self.assertGreaterEqual(entries[0]["wall_time"], entries[1]["wall_time"])
+
+    def test_csv(self) -> None:
+        path = os.path.join(self.directory.name, "report.csv")
+        self.report.write(path)
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(["output", "generate_output"], [row["stage"] for row in rows])
+        self.assertEqual("", rows[0]["player"])
+        self.assertEqual("1", rows[1]["player"])
@@ -1,10 +1,13 @@
 # Tests that yaml wrappers in Utils.py do what they should
 
+import os
 import unittest
+from unittest import mock
+from tempfile import TemporaryDirectory
 from typing import cast, Any, ClassVar, Dict
 
 from Utils import dump, Dumper  # type: ignore[attr-defined]
-from Utils import parse_yaml, parse_yamls, unsafe_parse_yaml
+from Utils import cache_path, parse_yaml, parse_yamls, parse_yamls_cached, unsafe_parse_yaml
 
 
 class AClass:
@@ -66,3 +69,35 @@ class TestYaml(unittest.TestCase):
             parse_yaml(s)
         with self.assertRaises(Exception):
             next(parse_yamls(s))
+
+    def test_cached_parse(self) -> None:
+        cache_dir = TemporaryDirectory()
+        original_cache_path = getattr(cache_path, "cached_path", None)
+        cache_path.cached_path = cache_dir.name
+        try:
+            s = "a: [1, 2]\n---\nb: &c {d: 1}\ne: *c\n"
+            parsed = parse_yamls_cached(s)
+            self.assertEqual(tuple(parse_yamls(s)), parsed)
+            self.assertEqual(1, len(os.listdir(os.path.join(cache_dir.name, "yaml"))))
+            cached = parse_yamls_cached(s.encode())
+            self.assertEqual(parsed, cached)
+            self.assertIs(cached[1]["b"], cached[1]["e"])
+            self.assertEqual(1, len(os.listdir(os.path.join(cache_dir.name, "yaml"))))
+            with self.assertRaises(Exception):
+                parse_yamls_cached("a: 1\na: 2\n")
+            # documents that can't be stored are still returned
+            self.assertEqual(1, len(parse_yamls_cached("a: 2001-01-01\n")))
+            # the least recently used entries are dropped once there are too many
+            with mock.patch("Utils.yaml_cache_size", 2):
+                parse_yamls_cached("b: 1\n")
+                parse_yamls_cached(s)
+                parse_yamls_cached("c: 1\n")
+            self.assertEqual(2, len(os.listdir(os.path.join(cache_dir.name, "yaml"))))
+            with mock.patch("Utils.parse_yamls", side_effect=AssertionError("parsed again")):
+                self.assertEqual(parsed, parse_yamls_cached(s))
+        finally:
+            if original_cache_path is None:
+                del cache_path.cached_path
+            else:
+                cache_path.cached_path = original_cache_path
+            cache_dir.cleanup()
@@ -6,9 +6,11 @@ import pathlib
 import random
 import re
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import make_dataclass
-from typing import (Any, Callable, ClassVar, Dict, FrozenSet, List, Mapping,
+from typing import (Any, Callable, ClassVar, Dict, FrozenSet, Iterable, List, Mapping,
                     Optional, Set, TextIO, Tuple, TYPE_CHECKING, Type, Union)
 
 from Options import PerGameCommonOptions
@@ -22,6 +24,10 @@ if TYPE_CHECKING:
 
 perf_logger = logging.getLogger("performance")
 
+concurrent_stages: bool = not getattr(sys, "_is_gil_enabled", lambda: True)()
+"""Whether call_all runs the World.isolated_stages of different worlds concurrently in threads.
+Defaults to on only for free-threaded Python, as with the GIL the threads would just take turns."""
+
 
 class AutoWorldRegister(type):
     world_types: Dict[str, Type[World]] = {}
@@ -53,6 +59,12 @@ class AutoWorldRegister(type):
         dct["item_name_groups"] = {group_name: frozenset(group_set) for group_name, group_set
                                    in dct.get("item_name_groups", {}).items()}
         dct["item_name_groups"]["Everything"] = dct["item_names"]
+        dct["item_name_to_index"] = {name: index for index, name in enumerate(dct["item_name_to_id"])}
+        dct["item_name_group_indices"] = {
+            group_name: (tuple(sorted(dct["item_name_to_index"][name] for name in group_set
+                                      if name in dct["item_name_to_index"])),
+                         tuple(sorted(name for name in group_set if name not in dct["item_name_to_index"])))
+            for group_name, group_set in dct["item_name_groups"].items()}
         dct["item_descriptions"] = {name: _normalize_description(description) for name, description
                                     in dct.get("item_descriptions", {}).items()}
         dct["item_descriptions"]["Everything"] = "All items in the entire game."
@@ -87,6 +99,13 @@ class AutoWorldRegister(type):
 
         # construct class
         new_class = super().__new__(mcs, name, bases, dct)
+        # overriding collect or remove may change counts of other names than the one returned by collect_item,
+        # overriding collect_item may pick a different name depending on what the state already holds
+        world_class = globals().get("World", new_class)
+        new_class.tracks_item_changes = not any("collect" in base.__dict__ or "remove" in base.__dict__ or
+                                                "collect_item" in base.__dict__
+                                                for base in new_class.__mro__
+                                                if isinstance(base, AutoWorldRegister) and base is not world_class)
         if "game" in dct:
             if dct["game"] in AutoWorldRegister.world_types:
                 raise RuntimeError(f"""Game {dct["game"]} already registered.""")
@@ -121,7 +140,17 @@ class AutoLogicRegister(type):
 def _timed_call(method: Callable[..., Any], *args: Any,
                 multiworld: Optional["MultiWorld"] = None, player: Optional[int] = None) -> Any:
     start = time.perf_counter()
-    ret = method(*args)
+    if multiworld and multiworld.profile_report:
+        if player:
+            measurement = multiworld.profile_report.measure(method.__name__, player, multiworld.player_name[player],
+                                                            multiworld.game[player])
+        else:
+            measurement = multiworld.profile_report.measure(method.__name__,
+                                                            game=getattr(method.__self__, "game", None))
+        with measurement:
+            ret = method(*args)
+    else:
+        ret = method(*args)
     taken = time.perf_counter() - start
     if taken > 1.0:
         if player and multiworld:
@@ -147,12 +176,65 @@ def call_single(multiworld: "MultiWorld", method_name: str, player: int, *args:
         return ret
 
 
+class _IsolatedItemPool(list):
+    """Stands in for multiworld.itempool while isolated stages run concurrently, keeping each thread's additions apart."""
+    def __init__(self, items: List["Item"]) -> None:
+        super().__init__(items)
+        self.added = threading.local()
+
+    def append(self, item: "Item") -> None:
+        self.added.items.append(item)
+
+    def extend(self, items: Iterable["Item"]) -> None:
+        self.added.items.extend(items)
+
+    def __iadd__(self, items: Iterable["Item"]) -> "_IsolatedItemPool":
+        self.added.items.extend(items)
+        return self
+
+    def _not_isolatable(self, *args: Any) -> Any:
+        # changes to items already in the pool would be lost when merging, and race with other threads reading it
+        raise RuntimeError("stage is not isolatable, it changes the itempool beyond adding items. "
+                           "Remove it from the world's isolated_stages.")
+
+    insert = remove = pop = clear = sort = reverse = __setitem__ = __delitem__ = __imul__ = _not_isolatable
+
+
+def _call_isolated(multiworld: "MultiWorld", method_name: str, players: List[int],
+                   *args: Any) -> Dict[int, List["Item"]]:
+    """Runs method_name of players' worlds concurrently, returning the items each of them added to the itempool."""
+    itempool = multiworld.itempool
+    isolated_pool = _IsolatedItemPool(itempool)
+
+    def call(player: int) -> List["Item"]:
+        isolated_pool.added.items = added_items = []
+        call_single(multiworld, method_name, player, *args)
+        return added_items
+
+    multiworld.itempool = isolated_pool
+    try:
+        with ThreadPoolExecutor(len(players), thread_name_prefix=method_name) as executor:
+            return dict(zip(players, executor.map(call, players)))
+    finally:
+        multiworld.itempool = itempool
+
+
 def call_all(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
     world_types: Set[AutoWorldRegister] = set()
+    isolated_items: Dict[int, List["Item"]] = {}
+    if concurrent_stages:
+        isolated_players = [player for player in multiworld.player_ids
+                            if method_name in multiworld.worlds[player].isolated_stages]
+        if len(isolated_players) > 1:
+            isolated_items = _call_isolated(multiworld, method_name, isolated_players, *args)
     for player in multiworld.player_ids:
         prev_item_count = len(multiworld.itempool)
         world_types.add(multiworld.worlds[player].__class__)
-        call_single(multiworld, method_name, player, *args)
+        if player in isolated_items:
+            # merged in player order, so the itempool ends up the same as when calling each world in turn
+            multiworld.itempool += isolated_items[player]
+        else:
+            call_single(multiworld, method_name, player, *args)
         if __debug__:
             new_items = multiworld.itempool[prev_item_count:]
             for i, item in enumerate(new_items):
@@ -169,7 +251,7 @@ def call_stage(multiworld: "MultiWorld", method_name: str, *args: Any) -> None:
     for world_type in sorted(world_types, key=lambda world: world.__name__):
         stage_callable = getattr(world_type, f"stage_{method_name}", None)
         if stage_callable:
-            _timed_call(stage_callable, multiworld, *args)
+            _timed_call(stage_callable, multiworld, *args, multiworld=multiworld)
 
 
 class WebWorld:
@@ -220,6 +302,28 @@ class World(metaclass=AutoWorldRegister):
     item_name_groups: ClassVar[Dict[str, Set[str]]] = {}
     """maps item group names to sets of items. Example: {"Weapons": {"Sword", "Bow"}}"""
 
+    item_name_to_index: ClassVar[Dict[str, int]]
+    """automatically generated dense index of each item name, used by indexed_item_counts"""
+    item_name_group_indices: ClassVar[Dict[str, Tuple[Tuple[int, ...], Tuple[str, ...]]]]
+    """automatically generated (indices, names without index) of each item name group, used by indexed_item_counts"""
+
+    tracks_item_changes: ClassVar[bool]
+    """automatically generated, False if collect, remove or collect_item are overridden, as those may change counts of
+    any names. Rules with declared dependencies on such a world are re-evaluated after every collect."""
+
+    indexed_item_counts: ClassVar[bool] = False
+    """store this world's collected items in an array indexed by item_name_to_index instead of a Counter.
+    Makes copying states and has_group cheaper. Names not in item_name_to_id fall back to a Counter."""
+
+    isolated_stages: ClassVar[FrozenSet[str]] = frozenset()
+    """names of stages, like "create_regions" or "create_items", in which this world only touches its own data and
+    self.random, and at most adds items to multiworld.itempool without reading it. call_all may run these stages
+    concurrently with other worlds' when AutoWorld.concurrent_stages is on, merging the itempool in player order."""
+
+    forked_output: ClassVar[bool] = False
+    """generate_output only writes files into the output directory and changes nothing read afterwards, like by
+    fill_slot_data, modify_multidata or write_spoiler. Lets Main run it in a forked worker process where available."""
+
     item_descriptions: ClassVar[Dict[str, str]] = {}
     """An optional map from item names (or item group names) to brief descriptions for users.
 
@@ -477,6 +581,7 @@ class World(metaclass=AutoWorldRegister):
         name = self.collect_item(state, item)
         if name:
             state.prog_items[self.player][name] += 1
+            state.note_item_change(self.player, name)
             return True
         return False
 
@@ -487,6 +592,7 @@ class World(metaclass=AutoWorldRegister):
             state.prog_items[self.player][name] -= 1
             if state.prog_items[self.player][name] < 1:
                 del (state.prog_items[self.player][name])
+            state.note_item_change(self.player, name)
             return True
         return False
 
@@ -63,6 +63,7 @@ class CV64World(World):
     settings: typing.ClassVar[CV64Settings]
     topology_present = True
     data_version = 1
+    forked_output = True
 
     item_name_to_id = get_item_names_to_ids()
     location_name_to_id = get_location_names_to_ids()
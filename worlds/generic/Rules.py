@@ -1,5 +1,6 @@
 import collections
 import logging
+import time
 import typing
 
 from BaseClasses import LocationProgressType, MultiWorld, Location, Region, Entrance
@@ -63,22 +64,33 @@ def locality_rules(world: MultiWorld):
                     if sending_player in receiving_group["players"]:
                         forbid(sending_player, receiving_group_id, receiving_group["non_local_items"])
 
+        # freeze into one flat table per location owner that has anything forbidden, covering every item owner,
+        # so the rules below only do a plain lookup and locations without restrictions keep their rule as is
+        no_blockers: typing.FrozenSet[str] = frozenset()
+        all_players = (*world.player_ids, *world.groups)
+        locality_table: typing.Dict[int, typing.Dict[int, typing.FrozenSet[str]]] = {
+            sending_player: {receiving_player: frozenset(receivers.get(receiving_player, ())) or no_blockers
+                             for receiving_player in all_players}
+            for sending_player, receivers in forbid_data.items() if any(receivers.values())
+        }
+
         # create fewer lambda's to save memory and cache misses
         func_cache = {}
         for location in world.get_locations():
+            if location.player not in locality_table:
+                continue
             if (location.player, location.item_rule) in func_cache:
                 location.item_rule = func_cache[location.player, location.item_rule]
             # empty rule that just returns True, overwrite
             elif location.item_rule is location.__class__.item_rule:
                 func_cache[location.player, location.item_rule] = location.item_rule = \
-                    lambda i, sending_blockers = forbid_data[location.player], \
-                                            old_rule = location.item_rule: \
+                    lambda i, sending_blockers = locality_table[location.player]: \
                     i.name not in sending_blockers[i.player]
             # special rule, needs to also be fulfilled.
             else:
                 func_cache[location.player, location.item_rule] = location.item_rule = \
-                    lambda i, sending_blockers = forbid_data[location.player], \
-                                            old_rule = location.item_rule: \
+                    lambda i, sending_blockers = locality_table[location.player], \
+                    old_rule = location.item_rule: \
                     i.name not in sending_blockers[i.player] and old_rule(i)
 
 
@@ -96,20 +108,42 @@ def exclusion_rules(multiworld: MultiWorld, player: int, exclude_locations: typi
                 logging.warning(f"Unable to exclude location {loc_name} in player {player}'s world.")
 
 
-def set_rule(spot: typing.Union["BaseClasses.Location", "BaseClasses.Entrance"], rule: CollectionRule):
+def set_rule(spot: typing.Union["BaseClasses.Location", "BaseClasses.Entrance"], rule: CollectionRule,
+             items: typing.Optional[typing.Iterable[str]] = None):
+    """
+    Sets the access rule of spot.
+    items optionally declares every item name of spot's player the rule reads, so the rule is only re-evaluated
+    after one of those changed. Leave it out if the rule reads anything else, like region reachability.
+    """
     spot.access_rule = rule
+    spot.access_dependencies = None if items is None else (rule, frozenset(items))
 
 
-def add_rule(spot: typing.Union["BaseClasses.Location", "BaseClasses.Entrance"], rule: CollectionRule, combine="and"):
+def _get_dependencies(spot: typing.Union["BaseClasses.Location", "BaseClasses.Entrance"]) \
+        -> typing.Optional[typing.FrozenSet[str]]:
+    if spot.access_rule is spot.__class__.access_rule:
+        return frozenset()
+    dependencies = spot.access_dependencies
+    if dependencies is None or dependencies[0] is not spot.access_rule:
+        return None
+    return dependencies[1]
+
+
+def add_rule(spot: typing.Union["BaseClasses.Location", "BaseClasses.Entrance"], rule: CollectionRule, combine="and",
+             items: typing.Optional[typing.Iterable[str]] = None):
+    """Combines rule with the existing access rule of spot. See set_rule for items."""
     old_rule = spot.access_rule
+    old_items = _get_dependencies(spot)
     # empty rule, replace instead of add
     if old_rule is spot.__class__.access_rule:
-        spot.access_rule = rule if combine == "and" else old_rule
+        if combine == "and":
+            set_rule(spot, rule, items)
     else:
         if combine == "and":
-            spot.access_rule = lambda state: rule(state) and old_rule(state)
+            new_rule = lambda state: rule(state) and old_rule(state)
         else:
-            spot.access_rule = lambda state: rule(state) or old_rule(state)
+            new_rule = lambda state: rule(state) or old_rule(state)
+        set_rule(spot, new_rule, None if items is None or old_items is None else old_items.union(items))
 
 
 def forbid_item(location: "BaseClasses.Location", item: str, player: int):
@@ -154,10 +188,15 @@ def item_name_in_location_names(state: "BaseClasses.CollectionState", item: str,
 
 def item_name_in_locations(item: str, player: int,
                            locations: typing.Sequence["BaseClasses.Location"]) -> bool:
-    for location in locations:
-        if location.item and location.item.name == item and location.item.player == player:
-            return True
-    return False
+    if not locations or not locations[0].parent_region or not locations[0].parent_region.multiworld:
+        return any(location.item and location.item.name == item and location.item.player == player
+                   for location in locations)
+    # there are usually far fewer copies of an item than locations to look through
+    placed = locations[0].parent_region.multiworld.find_item_locations(item, player)
+    if not placed:
+        return False
+    location_set = set(locations)
+    return any(location in location_set for location in placed)
 
 
 def location_item_name(state: "BaseClasses.CollectionState", location: str, player: int) -> \
@@ -193,3 +232,55 @@ def allow_self_locking_items(spot: typing.Union[Location, Region], *item_names:
                 add_allowed_rules(entrance, location)
     else:
         add_allowed_rules(spot, spot)
+
+
+class RuleProfile:
+    """
+    Counts how often the access rules of locations and entrances are evaluated and how long they take in total,
+    including time spent in anything they call, like reaching other regions.
+    Only rules set before instrument are measured, as well as anything add_rule combines with them later.
+    """
+    stats: typing.Dict[typing.Union[Location, Entrance], typing.List[typing.Union[int, float]]]
+    """[evaluations, seconds taken] per instrumented spot"""
+
+    def __init__(self) -> None:
+        self.stats = {}
+
+    def instrument(self, multiworld: MultiWorld) -> None:
+        spot: typing.Union[Location, Entrance]
+        for spot in (*multiworld.get_locations(), *multiworld.get_entrances()):
+            rule = spot.access_rule
+            if rule is spot.__class__.access_rule or spot in self.stats:
+                continue
+            self.stats[spot] = stats = [0, 0.0]
+
+            def counted_rule(state: "BaseClasses.CollectionState", rule: CollectionRule = rule,
+                             stats: typing.List[typing.Union[int, float]] = stats) -> bool:
+                start = time.perf_counter()
+                try:
+                    return rule(state)
+                finally:
+                    stats[0] += 1
+                    stats[1] += time.perf_counter() - start
+
+            dependencies = spot.access_dependencies
+            spot.access_rule = counted_rule
+            if dependencies is not None and dependencies[0] is rule:
+                spot.access_dependencies = counted_rule, dependencies[1]
+
+    def log_top(self, multiworld: MultiWorld, count: int = 20) -> None:
+        """Logs the count spots whose rules took the most time in total and the totals per player."""
+        logger = logging.getLogger("performance")
+        per_player: typing.Dict[int, typing.List[typing.Union[int, float]]] = \
+            collections.defaultdict(lambda: [0, 0.0])
+        for spot, (calls, taken) in self.stats.items():
+            per_player[spot.player][0] += calls
+            per_player[spot.player][1] += taken
+        logger.info(f"Most expensive access rules of {len(self.stats)} instrumented ones:")
+        for spot, (calls, taken) in sorted(self.stats.items(), key=lambda entry: entry[1][1], reverse=True)[:count]:
+            logger.info(f"{taken:10.4f}s {calls:10} calls  {type(spot).__name__} {spot.name} "
+                        f"of {multiworld.get_player_name(spot.player)} ({multiworld.game[spot.player]})")
+        logger.info("Access rule totals per player:")
+        for player, (calls, taken) in sorted(per_player.items(), key=lambda entry: entry[1][1], reverse=True):
+            logger.info(f"{taken:10.4f}s {calls:10} calls  {multiworld.get_player_name(player)} "
+                        f"({multiworld.game[player]})")
@@ -67,6 +67,7 @@ class L2ACWorld(World):
     }
     data_version: ClassVar[int] = 2
     required_client_version: Tuple[int, int, int] = (0, 4, 4)
+    forked_output: ClassVar[bool] = True
 
     # L2ACWorld specific properties
     rom_name: bytearray
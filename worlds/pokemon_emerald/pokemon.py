@@ -361,7 +361,9 @@ def randomize_wild_encounters(world: "PokemonEmeraldWorld") -> None:
                     try:
                         # Get the corresponding location and change the event name to reflect the new species
                         slot_location = world.multiworld.get_location(encounter_location_name, world.player)
-                        slot_location.item.name = f"CATCH_{data.species[new_species_id].name}"
+                        catch_item = slot_location.item
+                        catch_item.name = f"CATCH_{data.species[new_species_id].name}"
+                        slot_location.item = catch_item  # index the placement under the new name
                     except KeyError:
                         pass  # Map probably isn't included; should be careful here about bad encounter location names
 
@@ -563,6 +563,7 @@ class PokemonRedBlueWorld(World):
         # Convert all but one of each instance of a wild Pokemon to useful classification.
         # This cuts down on time spent calculating the spoiler playthrough.
         found_mons = set()
+        reclassified = False
         for sphere in multiworld.get_spheres():
             for location in sphere:
                 if (location.game == "Pokemon Red and Blue" and (location.item.name in poke_data.pokemon_data.keys()
@@ -571,8 +572,12 @@ class PokemonRedBlueWorld(World):
                     key = (location.player, location.item.name)
                     if key in found_mons:
                         location.item.classification = ItemClassification.useful
+                        reclassified = True
                     else:
                         found_mons.add(key)
+        if reclassified:
+            # sweeps over progression items only were made with the old classifications
+            multiworld.sphere_cache.invalidate()
 
     def create_regions(self):
         if (self.multiworld.old_man[self.player] == "vanilla" or
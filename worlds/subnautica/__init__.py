@@ -86,11 +86,10 @@ class SubnauticaWorld(World):
         for event in locations.events:
             location = SubnauticaLocation(self.player, event, None, planet_region)
             planet_region.locations.append(location)
+            # make the goal event the victory "item"
             location.place_locked_item(
-                SubnauticaItem(event, ItemClassification.progression, None, player=self.player))
-            if event == goal_event_name:
-                # make the goal event the victory "item"
-                location.item.name = "Victory"
+                SubnauticaItem("Victory" if event == goal_event_name else event, ItemClassification.progression,
+                               None, player=self.player))
 
         # Register regions to multiworld
         self.multiworld.regions += [